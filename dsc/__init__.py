@@ -0,0 +1,7 @@
+"""Helper modules for the Data-Sitters Club notebooks.
+
+The notebooks under ``site/`` are written to be read, so each one walks the
+corpus directory with its own ``os.listdir`` / ``open`` loop. The modules in
+this package do the same jobs for whole-corpus runs, where speed matters more
+than readability.
+"""
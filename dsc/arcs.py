@@ -0,0 +1,205 @@
+"""Syuzhet-style sentiment arcs in Python.
+
+DSC 11 draws a sentiment arc for each book with R's syuzhet package through
+rpy2: ``get_sentences``, ``get_sentiment`` and then plotting or smoothing.
+This module does the same scoring and smoothing with NumPy, so it needs no R
+runtime and the whole corpus can be scored in a process pool.
+
+The lexicons come from the syuzhet package. Export each one from R once, as a
+tab-separated file:
+
+    write.table(syuzhet::get_sentiment_dictionary("syuzhet"), "syuzhet.tsv",
+                sep="\\t", row.names=FALSE, quote=FALSE)
+
+(and the same for "bing", "afinn" and "nrc"). Then:
+
+    python -m dsc.arcs dsc_corpus_packed syuzhet.tsv bsc_syuzhet_arcs.csv --workers 8
+    python -m dsc.arcs dsc_corpus_packed bing.tsv bsc_bing_arcs.csv --method bing
+
+    from dsc.arcs import load_lexicon, sentence_sentiment, dct_transform
+    lexicon = load_lexicon('syuzhet.tsv')
+    syuzhet_vector = sentence_sentiment(booksentences, lexicon, method='syuzhet')
+    arc = dct_transform(syuzhet_vector)
+"""
+
+import argparse
+import csv
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from nltk import tokenize
+from scipy.fft import dct, idct
+
+
+# get_sentiment's default regex: lower-case, then split on anything but ASCII letters and
+# apostrophes, so "don't" stays one word
+TOKEN_SPLIT = re.compile(r"[^A-Za-z']+")
+# get_sentences straightens curly quotes before splitting
+CURLY_QUOTES = str.maketrans({"\u201c": '"', "\u201d": '"', "\u2018": "'", "\u2019": "'"})
+
+
+def load_lexicon(path):
+    """Read a lexicon exported from syuzhet into a {word: value} dict.
+
+    The syuzhet, bing and afinn dictionaries have word and value columns. The
+    nrc dictionary has a sentiment column too; like syuzhet, only its
+    positive (+value) and negative (-value) rows count.
+    """
+    lexicon = {}
+    with open(path, encoding="utf8", newline="") as f:
+        for row in csv.DictReader(f, delimiter="\t"):
+            value = float(row["value"])
+            if "sentiment" in row:
+                if row["sentiment"] == "negative":
+                    value = -value
+                elif row["sentiment"] != "positive":
+                    continue
+            lexicon[row["word"]] = lexicon.get(row["word"], 0.0) + value
+    return lexicon
+
+
+def get_sentences(text):
+    """Split a book into sentences, after collapsing its whitespace like get_text_as_string.
+
+    Curly quotes are straightened first, as get_sentences does.
+    """
+    return tokenize.sent_tokenize(" ".join(text.translate(CURLY_QUOTES).split()))
+
+
+def sentence_sentiment(sentences, lexicon, method="syuzhet"):
+    """Return a float array with the summed lexicon value of each sentence.
+
+    Like get_sentiment, each lexicon word counts once per sentence however
+    often it appears, and with the syuzhet method hyphens are dropped first
+    ("well-known" -> "wellknown").
+    """
+    values = []
+    sentence_ids = []
+    for number, sentence in enumerate(sentences):
+        if method == "syuzhet":
+            sentence = sentence.replace("-", "")
+        for token in set(TOKEN_SPLIT.split(sentence.lower())):
+            value = lexicon.get(token)
+            if value is not None:
+                values.append(value)
+                sentence_ids.append(number)
+    scores = np.zeros(len(sentences))
+    # Sum the word values into their sentences in one go
+    np.add.at(scores, np.array(sentence_ids, dtype=np.intp), np.array(values, dtype=float))
+    return scores
+
+
+def rescale(values):
+    """Rescale values to run from -1 to 1, like syuzhet's rescale()."""
+    values = np.asarray(values, dtype=float)
+    spread = values.max() - values.min()
+    if spread == 0:
+        return np.zeros_like(values)
+    return 2 * (values - values.min()) / spread - 1
+
+
+def dct_transform(raw_values, low_pass_size=5, x_reverse_len=100, scale_vals=False, scale_range=False):
+    """Smooth sentence scores into an arc of x_reverse_len points, like get_dct_transform.
+
+    Keeps the lowest low_pass_size DCT components and transforms back onto
+    x_reverse_len points. scipy's unnormalized DCT-II is twice the one syuzhet
+    gets from dtt::dct, and its inverse scales to match, so the values line up
+    with syuzhet's.
+    """
+    if scale_vals and scale_range:
+        raise ValueError("scale_vals and scale_range cannot both be True")
+    values = np.asarray(raw_values, dtype=float)
+    if low_pass_size > len(values):
+        raise ValueError("low_pass_size can't be larger than the number of values")
+    padded = np.zeros(x_reverse_len)
+    padded[:low_pass_size] = dct(values, type=2)[:low_pass_size]
+    arc = idct(padded, type=2)
+    if scale_vals:
+        return (arc - arc.mean()) / arc.std(ddof=1)
+    if scale_range:
+        return rescale(arc)
+    return arc
+
+
+def rolling_mean(values, window):
+    """Moving average over window values (zoo::rollmean with no padding)."""
+    values = np.asarray(values, dtype=float)
+    if window > len(values):
+        return np.array([])
+    sums = np.cumsum(np.insert(values, 0, 0.0))
+    return (sums[window:] - sums[:-window]) / window
+
+
+def percentage_values(values, bins=100):
+    """Mean score in each of bins equal slices of the book, like get_percentage_values."""
+    values = np.asarray(values, dtype=float)
+    return np.array([chunk.mean() if len(chunk) else np.nan
+                     for chunk in np.array_split(values, bins)])
+
+
+def book_arc(text, lexicon, low_pass_size=5, x_reverse_len=100, method="syuzhet"):
+    """Return (sentence scores, DCT-smoothed arc) for one book."""
+    scores = sentence_sentiment(get_sentences(text), lexicon, method)
+    return scores, dct_transform(scores, low_pass_size, x_reverse_len)
+
+
+# Each worker loads the lexicon and opens the packed corpus once
+_lexicon = None
+_corpus = None
+
+
+def _load(pack_dir, lexicon_path):
+    global _lexicon, _corpus
+    from dsc.corpus import Corpus
+    _lexicon = load_lexicon(lexicon_path)
+    _corpus = Corpus(pack_dir)
+
+
+def _arc_for(job):
+    filename, low_pass_size, x_reverse_len, method = job
+    scores, arc = book_arc(_corpus.text(filename), _lexicon, low_pass_size, x_reverse_len, method)
+    return filename, len(scores), arc
+
+
+def write_arcs(pack_dir, lexicon_path, outfile, workers=1, low_pass_size=5, x_reverse_len=100, method="syuzhet"):
+    """Write one row per book (filename, sentence count, arc values) to a CSV file.
+
+    method is the get_sentiment method the lexicon came from.
+    """
+    from dsc.corpus import read_index
+
+    jobs = [(record.filename, low_pass_size, x_reverse_len, method) for record in read_index(pack_dir)]
+    with open(outfile, "w", encoding="utf8", newline="") as out:
+        writer = csv.writer(out)
+        writer.writerow(["filename", "sentences"] + [str(i) for i in range(1, x_reverse_len + 1)])
+        if workers == 1:
+            _load(pack_dir, lexicon_path)
+            for filename, count, arc in map(_arc_for, jobs):
+                writer.writerow([filename, count] + arc.tolist())
+            return len(jobs)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_load,
+                                 initargs=(pack_dir, lexicon_path)) as executor:
+            for filename, count, arc in executor.map(_arc_for, jobs):
+                writer.writerow([filename, count] + arc.tolist())
+    return len(jobs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a DCT-smoothed sentiment arc for every book.")
+    parser.add_argument("pack_dir", help="packed corpus directory (see dsc.corpus)")
+    parser.add_argument("lexicon", help="lexicon TSV exported from syuzhet")
+    parser.add_argument("outfile", help="CSV file to write")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    parser.add_argument("--low-pass-size", type=int, default=5)
+    parser.add_argument("--points", type=int, default=100, help="length of each arc")
+    parser.add_argument("--method", choices=("syuzhet", "bing", "afinn", "nrc"), default="syuzhet",
+                        help="the syuzhet dictionary the lexicon was exported from")
+    args = parser.parse_args()
+    count = write_arcs(args.pack_dir, args.lexicon, args.outfile, args.workers, args.low_pass_size, args.points,
+                       args.method)
+    print("Wrote arcs for {} books".format(count))
+
+
+if __name__ == "__main__":
+    main()
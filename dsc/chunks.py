@@ -0,0 +1,176 @@
+"""Split chapters into ~100-word chunks tagged with narrator and chapter, for the DSC 20 topic models.
+
+DSC 20 builds ``dsc_chunks_by_chapter_and_narrator.tsv`` by running
+``nltk.word_tokenize`` separately on every paragraph of every chapter, just to
+count tokens, and adding paragraphs to a chunk until it reaches ``CHUNK_SIZE``.
+The pronoun tagging splits each line into a word list and checks every word
+against a list of matches. It also reads ``next_line`` instead of its ``line``
+argument. This module tokenizes each chapter once with a regular expression
+and counts each paragraph's tokens with ``np.searchsorted`` on the paragraph
+start offsets. Chunk boundaries are found by searching the cumulative counts,
+so only one step is taken per chunk, not per paragraph. Dialogue removal
+(dsc.normalize's ``no-dialogue``) and narrator-tagged pronouns ("I_Kristy")
+are one regex substitution each. Chapters are spread over a process pool:
+
+    python -m dsc.chunks dsc_metadata.tsv txt dsc_chunks_by_chapter_and_narrator.tsv --workers 8
+    python -m dsc.chunks dsc_metadata.tsv txt dsc_chunks_no_dialogue.tsv --remove-dialogue --narrator-pronouns
+
+Rows are in the notebook's MALLET format, ``<file>-<chunk #>\\t<narrator>_<chapter #>\\t<text>``.
+"""
+
+import argparse
+import csv
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from dsc.normalize import normalize
+
+
+CHUNK_SIZE = 100  # we keep adding paragraphs until we reach 100 tokens
+OUT_FILE = "dsc_chunks_by_chapter_and_narrator.tsv"
+
+# Close to word_tokenize's counts: contractions split off ("do" "n't", "I" "'m"),
+# hyphenated words kept whole, "..." as one token and other punctuation one mark at a time
+TOKEN = re.compile(r"\w+?(?=n't\b)|n't\b|'\w+|\w+(?:-\w+)*|\.\.\.|[^\w\s]")
+PARAGRAPH_BREAK = re.compile(r"\n\n")
+# The first-person pronouns augment_pronouns tags, as whole whitespace-separated words
+PRONOUN = re.compile(r"(?<!\S)(I|[mM][ey]+|[mM]yself|I'[a-z]+)(?!\S)")
+
+
+def read_narrators(metadata_file):
+    """make_file_to_babysitter_dict: {file prefix: narrator} from the metadata TSV."""
+    with open(metadata_file, encoding="utf8", newline="") as f:
+        return {re.sub(r"(-s)?\.txt", "", row["filename"]): row["narrator"]
+                for row in csv.DictReader(f, delimiter="\t")}
+
+
+def chapter_metadata(fname, narrators):
+    """(file prefix, chapter number, narrator, filename), or None if the book has no narrator."""
+    match = re.search(r"_([0-9]+)\.txt", fname)
+    if match is None:
+        return None
+    file_prefix = fname[:match.start()] + fname[match.end():]
+    narrator = narrators.get(file_prefix)
+    if narrator is None:
+        return None
+    return (file_prefix, int(match.group(1)), narrator, fname)
+
+
+def augment_pronouns(text, narrator):
+    """Add the narrator to every first-person pronoun: I -> I_Kristy, my -> my_Kristy, I'm -> I'm_Kristy."""
+    return PRONOUN.sub(r"\1_" + narrator, text)
+
+
+def paragraph_token_counts(text):
+    """Split text into paragraphs (on blank lines, like text.split("\\n\\n")) and count each one's tokens."""
+    breaks = [m.end() for m in PARAGRAPH_BREAK.finditer(text)]
+    paragraph_starts = np.array([0] + breaks, dtype=np.int64)
+    ends = [start - 2 for start in breaks] + [len(text)]
+    paragraphs = [text[start:end] for start, end in zip(paragraph_starts, ends)]
+    token_starts = np.fromiter((m.start() for m in TOKEN.finditer(text)), dtype=np.int64)
+    # The paragraph each token starts in
+    owners = np.searchsorted(paragraph_starts, token_starts, side="right") - 1
+    return paragraphs, np.bincount(owners, minlength=len(paragraphs))
+
+
+def chunk_ends(counts, chunk_size=CHUNK_SIZE):
+    """Indices one past the last paragraph of each full chunk.
+
+    A chunk closes at the first paragraph where its running total reaches
+    chunk_size. That is one searchsorted per chunk on the cumulative counts.
+    """
+    cumulative = np.cumsum(counts)
+    ends = []
+    base = 0
+    while True:
+        end = int(np.searchsorted(cumulative, base + chunk_size, side="left"))
+        if end >= len(cumulative):
+            return ends, base
+        ends.append(end + 1)
+        base = cumulative[end]
+
+
+def split_text_into_paragraph_chunks(text, chunk_size=CHUNK_SIZE):
+    """Chunks of whole paragraphs, each with at least chunk_size tokens except maybe the last."""
+    paragraphs, counts = paragraph_token_counts(text)
+    ends, closed_tokens = chunk_ends(counts, chunk_size)
+    pieces = [p.strip().replace("\n", " ") for p in paragraphs]
+    chunks = []
+    start = 0
+    for end in ends:
+        chunks.append(" ".join(pieces[start:end]))
+        start = end
+    # Like the notebook, a left-over chunk keeps its trailing space and is
+    # only written if it has any tokens
+    if counts.sum() > closed_tokens:
+        chunks.append(" ".join(pieces[start:]) + " ")
+    return chunks
+
+
+def chunk_rows(data_path, metadata, remove_dialogue=False, narrator_pronouns=False, chunk_size=CHUNK_SIZE):
+    """The TSV rows for one chapter, as one string."""
+    _, chapter, narrator, fname = metadata
+    with open(os.path.join(data_path, fname), encoding="utf8") as chapter_file:
+        text = chapter_file.read()
+    if remove_dialogue:
+        # The notebook cleans each line separately; no-dialogue never matches
+        # across a newline, so the whole chapter can go through at once
+        text = normalize(text, "no-dialogue")
+    if narrator_pronouns:
+        text = augment_pronouns(text, narrator)
+    chunks = split_text_into_paragraph_chunks(text, chunk_size)
+    return "".join("{}-{}\t{}_{}\t{}\n".format(fname, i, narrator, chapter, chunk)
+                   for i, chunk in enumerate(chunks))
+
+
+def _chunk_rows(args):
+    return chunk_rows(*args)
+
+
+def write_chunked_tsv(metadata_file, data_path, out_file=OUT_FILE, remove_dialogue=False,
+                      narrator_pronouns=False, chunk_size=CHUNK_SIZE, workers=1):
+    """Write every chapter's chunks to out_file, in filename order.
+
+    Returns the chapter files skipped because their book has no narrator in the metadata.
+    """
+    narrators = read_narrators(metadata_file)
+    listing, missing = [], []
+    for fname in sorted(f for f in os.listdir(data_path) if f.endswith(".txt")):
+        metadata = chapter_metadata(fname, narrators)
+        if metadata is None:
+            missing.append(fname)
+        else:
+            listing.append((data_path, metadata, remove_dialogue, narrator_pronouns, chunk_size))
+    with open(out_file, "w", encoding="utf8") as wf:
+        if workers == 1:
+            for chapter_rows in map(_chunk_rows, listing):
+                wf.write(chapter_rows)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for chapter_rows in executor.map(_chunk_rows, listing, chunksize=16):
+                    wf.write(chapter_rows)
+    return missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the DSC 20 narrator/chapter chunk TSV for MALLET.")
+    parser.add_argument("metadata", help="metadata TSV with filename and narrator columns (dsc_metadata.tsv)")
+    parser.add_argument("data_path", help="directory of chapter .txt files")
+    parser.add_argument("outfile", nargs="?", default=OUT_FILE, help="TSV to write")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="minimum tokens per chunk")
+    parser.add_argument("--remove-dialogue", action="store_true", help="remove dialogue first (clean_quotes)")
+    parser.add_argument("--narrator-pronouns", action="store_true", help="tag first-person pronouns with the narrator")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    args = parser.parse_args()
+    missing = write_chunked_tsv(args.metadata, args.data_path, args.outfile, args.remove_dialogue,
+                                args.narrator_pronouns, args.chunk_size, args.workers)
+    if missing:
+        # Usually a typo in the metadata sheet (Stacy for Stacey...)
+        print("No narrator in {} for {} chapter files, e.g. {}".format(args.metadata, len(missing), missing[0]))
+
+
+if __name__ == "__main__":
+    main()
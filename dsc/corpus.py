@@ -0,0 +1,172 @@
+"""Pack a directory of text files into one memory-mapped corpus file.
+
+Every notebook starts by walking ``dsc_corpus_clean`` and opening each book.
+On a network drive that means hundreds of small, slow reads every time. Packing
+the corpus once writes all the texts into a single UTF-8 file (``corpus.bin``)
+plus an index (``index.tsv``) giving the byte range of each file. Loading the
+packed corpus memory-maps the blob, so asking for a book is just a slice.
+
+    python -m dsc.corpus /Users/qad/Documents/dsc_corpus_clean dsc_corpus_packed
+
+    from dsc.corpus import Corpus
+    corpus = Corpus('dsc_corpus_packed')
+    for filename, text in corpus.items():
+        ...
+"""
+
+import argparse
+import csv
+import mmap
+import os
+import re
+from collections import namedtuple
+
+
+BLOB_NAME = "corpus.bin"
+INDEX_NAME = "index.tsv"
+INDEX_FIELDS = ["filename", "series", "book", "chapter", "start", "end"]
+
+# Filenames look like 002c_claudia_and_the_phantom_phone_calls.txt, with a
+# series prefix for everything that isn't the main series (ss, m, serr, cd, pc,
+# ff...) and an _N suffix when the file is a single chapter. Any run of letters
+# before the book number is taken as the series, so new prefixes need no change.
+FILENAME_PATTERN = re.compile(
+    r"^(?P<series>[a-z]+)?(?P<book>[0-9]+)[a-z]*_.*?(?:_(?P<chapter>[0-9]+))?(?:-s)?\.txt$")
+
+Record = namedtuple("Record", INDEX_FIELDS)
+
+
+def parse_filename(filename):
+    """Return (series, book number, chapter number) for a corpus filename.
+
+    Series is 'main' when there is no prefix; book and chapter are None when
+    the filename doesn't carry them.
+    """
+    match = FILENAME_PATTERN.match(os.path.basename(filename))
+    if match is None:
+        return ("main", None, None)
+    chapter = match.group("chapter")
+    return (match.group("series") or "main",
+            int(match.group("book")),
+            int(chapter) if chapter is not None else None)
+
+
+def pack_corpus(corpus_dir, pack_dir):
+    """Write every .txt file in corpus_dir into pack_dir/corpus.bin + index.tsv.
+
+    Files are packed in sorted order. Returns the number of files packed.
+    """
+    os.makedirs(pack_dir, exist_ok=True)
+    filenames = sorted(f for f in os.listdir(corpus_dir) if f.endswith(".txt"))
+    offset = 0
+    with open(os.path.join(pack_dir, BLOB_NAME), "wb") as blob, \
+            open(os.path.join(pack_dir, INDEX_NAME), "w", encoding="utf8", newline="") as index:
+        writer = csv.writer(index, delimiter="\t", lineterminator="\n")
+        writer.writerow(INDEX_FIELDS)
+        for filename in filenames:
+            with open(os.path.join(corpus_dir, filename), "rb") as f:
+                data = f.read()
+            # Fail here rather than when someone reads the book back
+            data.decode("utf8")
+            blob.write(data)
+            series, book, chapter = parse_filename(filename)
+            writer.writerow([filename, series,
+                             "" if book is None else book,
+                             "" if chapter is None else chapter,
+                             offset, offset + len(data)])
+            offset += len(data)
+    return len(filenames)
+
+
+def read_index(pack_dir):
+    """Read index.tsv from a packed corpus into a list of Records."""
+    records = []
+    with open(os.path.join(pack_dir, INDEX_NAME), encoding="utf8", newline="") as f:
+        for row in csv.DictReader(f, delimiter="\t"):
+            records.append(Record(
+                row["filename"],
+                row["series"],
+                int(row["book"]) if row["book"] else None,
+                int(row["chapter"]) if row["chapter"] else None,
+                int(row["start"]),
+                int(row["end"])))
+    return records
+
+
+class Corpus:
+    """A packed corpus, memory-mapped read-only.
+
+    ``raw(filename)`` returns a zero-copy memoryview of the UTF-8 bytes;
+    ``text(filename)`` decodes that slice to a str.
+    """
+
+    def __init__(self, pack_dir):
+        self.pack_dir = pack_dir
+        self.records = read_index(pack_dir)
+        self._by_name = {r.filename: r for r in self.records}
+        self._file = open(os.path.join(pack_dir, BLOB_NAME), "rb")
+        if os.fstat(self._file.fileno()).st_size == 0:
+            # mmap can't map an empty file; an empty corpus has nothing to slice
+            self._map = b""
+        else:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+
+    @property
+    def filenames(self):
+        return [r.filename for r in self.records]
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.filenames)
+
+    def __contains__(self, filename):
+        return filename in self._by_name
+
+    def record(self, filename):
+        return self._by_name[filename]
+
+    def raw(self, filename):
+        record = self._by_name[filename]
+        return self._view[record.start:record.end]
+
+    def text(self, filename):
+        return str(self.raw(filename), "utf8")
+
+    def items(self):
+        """Yield (filename, text) for every file, in packed (sorted) order."""
+        for record in self.records:
+            yield record.filename, str(self._view[record.start:record.end], "utf8")
+
+    def select(self, series=None, chapter=None):
+        """Return the filenames matching a series and/or chapter number."""
+        return [r.filename for r in self.records
+                if (series is None or r.series == series)
+                and (chapter is None or r.chapter == chapter)]
+
+    def close(self):
+        self._view.release()
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack a directory of .txt files into a memory-mapped corpus.")
+    parser.add_argument("corpus_dir", help="directory of .txt files, e.g. dsc_corpus_clean")
+    parser.add_argument("pack_dir", help="where to write corpus.bin and index.tsv")
+    args = parser.parse_args()
+    count = pack_corpus(args.corpus_dir, args.pack_dir)
+    print("Packed {} files into {}".format(count, args.pack_dir))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""Cosine and Euclidean distances between documents without a dense n x n matrix.
+
+DSC 8 and DSC 9 turn the document-term matrix into a dense array with
+``.toarray()``, then build the full ``squareform(pdist(...))`` distance matrix
+as a DataFrame. That's fine for a few hundred books, but books plus chapters
+(~10k files) don't fit in memory that way. This module keeps the DTM sparse.
+It computes distances a block of rows at a time, in float32, with sparse
+matrix products, and either keeps only each document's k nearest neighbours
+or streams the blocks into a .npy file on disk. ``RunningSums`` keeps DSC 9's
+summed distances up to date as new documents arrive, computing only the
+new-vs-all blocks.
+
+    from sklearn.feature_extraction.text import CountVectorizer
+    from dsc.distances import nearest_neighbours
+    vectorizer = CountVectorizer(input="filename", max_features=1000, max_df=.7)
+    wordcounts = vectorizer.fit_transform(filenames)  # no .toarray()
+    neighbours = nearest_neighbours(wordcounts, filekeys, k=10, metric='cosine')
+
+    python -m dsc.distances /Users/qad/Documents/dsc_corpus_clean cosine_neighbours.csv -k 10
+"""
+
+import argparse
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+METRICS = ("cosine", "euclidean")
+BLOCK_SIZE = 1024
+
+
+class _Prepared:
+    # The parts of X that every block needs: the (row-normalized, for cosine)
+    # matrix, its transpose, and squared row norms (for euclidean)
+
+    def __init__(self, X, metric):
+        if metric not in METRICS:
+            raise ValueError("metric must be one of {}".format(", ".join(METRICS)))
+        X = sparse.csr_matrix(X, dtype=np.float32)
+        sq_norms = np.asarray(X.multiply(X).sum(axis=1), dtype=np.float32).ravel()
+        if metric == "cosine":
+            norms = np.sqrt(sq_norms)
+            # Like pdist, an all-zero row has no direction, so its distances are NaN
+            self.empty = norms == 0
+            norms[self.empty] = 1
+            X = sparse.diags(1 / norms).dot(X).tocsr()
+        self.metric = metric
+        self.X = X
+        self.XT = X.T.tocsc()
+        self.sq_norms = sq_norms
+
+    def __len__(self):
+        return self.X.shape[0]
+
+    def block(self, start, stop, other=None):
+        """Dense float32 distances from rows start:stop to every row of other (default: X)."""
+        other = self if other is None else other
+        products = (self.X[start:stop] @ other.XT).toarray().astype(np.float32, copy=False)
+        if self.metric == "cosine":
+            distances = 1 - products
+            np.clip(distances, 0, 2, out=distances)
+            distances[self.empty[start:stop], :] = np.nan
+            distances[:, other.empty] = np.nan
+            return distances
+        squared = self.sq_norms[start:stop, None] + other.sq_norms[None, :] - 2 * products
+        np.clip(squared, 0, None, out=squared)
+        return np.sqrt(squared)
+
+
+def iter_distance_blocks(X, metric="cosine", block_size=BLOCK_SIZE):
+    """Yield (start row, block) pairs covering the full distance matrix of X.
+
+    Each block is a dense float32 array of shape (rows in block, n).
+    """
+    prepared = _Prepared(X, metric)
+    for start in range(0, len(prepared), block_size):
+        block = prepared.block(start, min(start + block_size, len(prepared)))
+        # Every document is exactly 0 from itself (squareform does the same),
+        # rather than float32 rounding noise
+        block[np.arange(len(block)), np.arange(start, start + len(block))] = 0
+        yield start, block
+
+
+def nearest_neighbours(X, keys, k=10, metric="cosine", block_size=BLOCK_SIZE):
+    """Return a DataFrame of the k nearest other documents for every document.
+
+    Columns are filename, neighbour, rank (1 = closest) and distance.
+    """
+    keys = list(keys)
+    n = len(keys)
+    k = min(k, n - 1)
+    rows = []
+    for start, block in iter_distance_blocks(X, metric, block_size):
+        # A document is always closest to itself, so leave it out
+        block[np.arange(len(block)), np.arange(start, start + len(block))] = np.inf
+        block = np.where(np.isnan(block), np.inf, block)
+        nearest = np.argpartition(block, k - 1, axis=1)[:, :k] if k > 0 else np.zeros((len(block), 0), int)
+        nearest_distances = np.take_along_axis(block, nearest, axis=1)
+        order = np.argsort(nearest_distances, axis=1, kind="stable")
+        nearest = np.take_along_axis(nearest, order, axis=1)
+        nearest_distances = np.take_along_axis(nearest_distances, order, axis=1)
+        for offset in range(len(block)):
+            for rank in range(k):
+                rows.append((keys[start + offset], keys[nearest[offset, rank]],
+                             rank + 1, float(nearest_distances[offset, rank])))
+    return pd.DataFrame(rows, columns=["filename", "neighbour", "rank", "distance"])
+
+
+def row_sums(X, metric="cosine", block_size=BLOCK_SIZE):
+    """Sum of each document's distances to every document (the DSC 9 'Sum' column).
+
+    NaN distances (from empty documents) are skipped, as DataFrame.sum does.
+    """
+    sums = np.zeros(X.shape[0], dtype=np.float64)
+    for start, block in iter_distance_blocks(X, metric, block_size):
+        sums[start:start + len(block)] = np.nansum(block, axis=1, dtype=np.float64)
+    return sums
+
+
+class RunningSums:
+    """Summed distances kept up to date as documents are added, for DSC 9's 'Sum' ranking.
+
+    Holds the (already weighted/normalized) document matrix, its keys and each
+    document's running sum of distances to every document. Adding a batch
+    only computes the batch-vs-all blocks: O(batch x n), not O(n x n).
+    """
+
+    def __init__(self, X, keys, sums, metric="cosine", vocab=None):
+        self.X = sparse.csr_matrix(X, dtype=np.float32)
+        self.keys = list(keys)
+        self.sums = np.asarray(sums, dtype=np.float64)
+        self.metric = metric
+        # The columns of X, so new texts can be counted the same way
+        self.vocab = None if vocab is None else np.asarray(vocab, dtype=str)
+        self._prepared = None
+
+    @classmethod
+    def build(cls, X, keys, metric="cosine", vocab=None, block_size=BLOCK_SIZE):
+        return cls(X, keys, row_sums(X, metric, block_size), metric, vocab)
+
+    def add(self, X_new, keys_new, block_size=BLOCK_SIZE):
+        """Add new documents (rows with the same columns as X) and update every sum."""
+        keys_new = list(keys_new)
+        duplicates = set(keys_new) & set(self.keys)
+        if duplicates:
+            raise ValueError("Already ranked: {}".format(", ".join(sorted(duplicates))))
+        if self._prepared is None:
+            self._prepared = _Prepared(self.X, self.metric)
+        X_new = sparse.csr_matrix(X_new, dtype=np.float32)
+        new = _Prepared(X_new, self.metric)
+        new_sums = np.zeros(len(new), dtype=np.float64)
+        for start in range(0, len(new), block_size):
+            stop = min(start + block_size, len(new))
+            to_old = new.block(start, stop, self._prepared)
+            to_new = new.block(start, stop, new)
+            to_new[np.arange(stop - start), np.arange(start, stop)] = 0
+            # Distances are symmetric, so the new columns of the old rows are the same block
+            self.sums += np.nansum(to_old, axis=0, dtype=np.float64)
+            new_sums[start:stop] = (np.nansum(to_old, axis=1, dtype=np.float64)
+                                    + np.nansum(to_new, axis=1, dtype=np.float64))
+        self.X = sparse.vstack([self.X, X_new], format="csr")
+        self.keys.extend(keys_new)
+        self.sums = np.concatenate([self.sums, new_sums])
+        self._prepared = None
+
+    def ranking(self):
+        """DataFrame of the Sum column, indexed by key."""
+        return pd.DataFrame({"Sum": self.sums}, index=pd.Index(self.keys, name="filename"))
+
+    def nlargest(self, n=10):
+        return self.ranking().nlargest(n, "Sum")
+
+    def nsmallest(self, n=10):
+        return self.ranking().nsmallest(n, "Sum")
+
+    def save(self, path):
+        np.savez(path, data=self.X.data, indices=self.X.indices, indptr=self.X.indptr,
+                 shape=np.array(self.X.shape), keys=np.array(self.keys, dtype=str), sums=self.sums,
+                 metric=np.array(self.metric), vocab=np.array([] if self.vocab is None else self.vocab, dtype=str))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            X = sparse.csr_matrix((data["data"], data["indices"], data["indptr"]), shape=tuple(data["shape"]))
+            vocab = data["vocab"] if len(data["vocab"]) else None
+            return cls(X, data["keys"].tolist(), data["sums"], str(data["metric"]), vocab)
+
+
+def write_distance_matrix(X, path, metric="cosine", block_size=BLOCK_SIZE):
+    """Write the full n x n float32 distance matrix to a .npy file, one block at a time.
+
+    Open it again with np.load(path, mmap_mode='r') to read parts of it
+    without loading the whole matrix.
+    """
+    n = X.shape[0]
+    matrix = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(n, n))
+    for start, block in iter_distance_blocks(X, metric, block_size):
+        matrix[start:start + len(block)] = block
+    matrix.flush()
+    del matrix
+
+
+def main():
+    from sklearn.feature_extraction.text import CountVectorizer
+
+    parser = argparse.ArgumentParser(description="Write the k nearest neighbours of every text file.")
+    parser.add_argument("filedir", help="directory of .txt files")
+    parser.add_argument("outfile", help="CSV file of neighbours to write")
+    parser.add_argument("-k", type=int, default=10, help="neighbours per document")
+    parser.add_argument("--metric", choices=METRICS, default="cosine")
+    parser.add_argument("--matrix", help="also write the full distance matrix to this .npy file")
+    parser.add_argument("--dtm", help="dsc.dtm cache prefix to read the word counts from")
+    args = parser.parse_args()
+    if args.dtm:
+        from dsc.dtm import load_or_build
+        dtm = load_or_build(args.filedir, args.dtm)
+        wordcounts, _ = dtm.view(max_features=1000, max_df=.7)
+        filekeys = dtm.keys
+    else:
+        filenames = sorted(glob.glob(os.path.join(args.filedir, "*.txt")))
+        filekeys = [os.path.basename(f).split(".")[0] for f in filenames]
+        vectorizer = CountVectorizer(input="filename", max_features=1000, max_df=.7)
+        wordcounts = vectorizer.fit_transform(filenames)
+    nearest_neighbours(wordcounts, filekeys, args.k, args.metric).to_csv(args.outfile, index=False)
+    if args.matrix:
+        write_distance_matrix(wordcounts, args.matrix, args.metric)
+
+
+if __name__ == "__main__":
+    main()
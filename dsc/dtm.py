@@ -0,0 +1,159 @@
+"""Build the document-term matrix once and derive every vectorizer view from it.
+
+DSC 8, 9 and 10 refit ``CountVectorizer(input="filename", max_features=1000,
+max_df=.7)`` or ``TfidfVectorizer(input="filename", norm='l1', ...)`` from the
+text files every time a notebook runs. Changing one parameter means reading
+and tokenizing the whole corpus again. This module counts every word in every
+file once (same tokenizer as CountVectorizer). It saves the full sparse count
+matrix as CSR ``.npz`` plus the vocabulary. Any ``max_features`` / ``max_df`` /
+l1 / tf-idf version is then picked out of the cached matrix by selecting
+columns and rescaling rows.
+
+    from dsc.dtm import load_or_build
+    dtm = load_or_build('/Users/qad/Documents/dsc_corpus_clean', 'dsc_corpus_dtm')
+    # Same as CountVectorizer(input="filename", max_features=1000, max_df=.7)
+    wordcounts, vocab = dtm.view(max_features=1000, max_df=.7)
+    # Same as TfidfVectorizer(input="filename", use_idf=False, norm='l1', max_features=1000)
+    wordfreqs4real, vocab = dtm.view(max_features=1000, norm='l1')
+
+    python -m dsc.dtm /Users/qad/Documents/dsc_corpus_clean dsc_corpus_dtm
+"""
+
+import argparse
+import csv
+import os
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer
+
+
+def _file_manifest(filenames):
+    # What the cache was built from: if any file is added, removed or
+    # modified, the cached matrix is out of date
+    return [(os.path.basename(f), os.stat(f).st_size, os.stat(f).st_mtime_ns) for f in filenames]
+
+
+class DTM:
+    """A full-vocabulary document-term count matrix.
+
+    counts is a CSR matrix (documents x words, int64), vocab the words in
+    column order (alphabetical, as CountVectorizer sorts them), and keys the
+    document names in row order.
+    """
+
+    def __init__(self, counts, vocab, keys, manifest=None):
+        self.counts = sparse.csr_matrix(counts, dtype=np.int64)
+        self.vocab = np.asarray(vocab, dtype=str)
+        self.keys = list(keys)
+        self.manifest = manifest
+
+    @classmethod
+    def from_texts(cls, texts, keys, input="content"):
+        """Count every word in texts (strings, or filenames with input='filename')."""
+        vectorizer = CountVectorizer(input=input)
+        counts = vectorizer.fit_transform(texts)
+        return cls(counts, vectorizer.get_feature_names_out(), keys)
+
+    @classmethod
+    def from_files(cls, filenames):
+        keys = [os.path.basename(f).split(".")[0] for f in filenames]
+        dtm = cls.from_texts(filenames, keys, input="filename")
+        dtm.manifest = _file_manifest(filenames)
+        return dtm
+
+    def save(self, prefix):
+        """Write prefix.npz (counts), prefix.vocab.txt and prefix.docs.tsv."""
+        sparse.save_npz(prefix + ".npz", self.counts)
+        with open(prefix + ".vocab.txt", "w", encoding="utf8") as out:
+            for word in self.vocab:
+                out.write(word + "\n")
+        with open(prefix + ".docs.tsv", "w", encoding="utf8", newline="") as out:
+            writer = csv.writer(out, delimiter="\t", lineterminator="\n")
+            writer.writerow(["key", "filename", "size", "mtime_ns"])
+            manifest = self.manifest or [("", "", "")] * len(self.keys)
+            for key, (filename, size, mtime) in zip(self.keys, manifest):
+                writer.writerow([key, filename, size, mtime])
+
+    @classmethod
+    def load(cls, prefix):
+        counts = sparse.load_npz(prefix + ".npz")
+        with open(prefix + ".vocab.txt", encoding="utf8") as f:
+            vocab = f.read().splitlines()
+        keys = []
+        manifest = []
+        with open(prefix + ".docs.tsv", encoding="utf8", newline="") as f:
+            for row in csv.DictReader(f, delimiter="\t"):
+                keys.append(row["key"])
+                if row["filename"]:
+                    manifest.append((row["filename"], int(row["size"]), int(row["mtime_ns"])))
+        return cls(counts, vocab, keys, manifest or None)
+
+    def _limit(self, max_features, max_df, min_df):
+        # The same column selection CountVectorizer._limit_features does
+        n_docs = self.counts.shape[0]
+        max_doc_count = max_df if isinstance(max_df, (int, np.integer)) else max_df * n_docs
+        min_doc_count = min_df if isinstance(min_df, (int, np.integer)) else min_df * n_docs
+        dfs = np.bincount(self.counts.indices, minlength=self.counts.shape[1])
+        tfs = np.asarray(self.counts.sum(axis=0)).ravel()
+        mask = np.ones(len(dfs), dtype=bool)
+        mask &= dfs <= max_doc_count
+        mask &= dfs >= min_doc_count
+        if max_features is not None and mask.sum() > max_features:
+            mask_inds = (-tfs[mask]).argsort()[:max_features]
+            new_mask = np.zeros(len(dfs), dtype=bool)
+            new_mask[np.where(mask)[0][mask_inds]] = True
+            mask = new_mask
+        return np.flatnonzero(mask)
+
+    def view(self, max_features=None, max_df=1.0, min_df=1, norm=None, use_idf=False):
+        """Return (matrix, vocab) as the equivalent vectorizer would produce them.
+
+        max_features/max_df/min_df select columns like CountVectorizer.
+        use_idf applies TfidfVectorizer's smoothed idf weighting, and norm
+        ('l1' or 'l2') normalizes each row. Counts come back as int64 when
+        neither is used, and float64 otherwise.
+        """
+        columns = self._limit(max_features, max_df, min_df)
+        matrix = self.counts[:, columns]
+        if use_idf:
+            n_docs = matrix.shape[0]
+            dfs = np.bincount(matrix.indices, minlength=matrix.shape[1])
+            idf = np.log((1 + n_docs) / (1 + dfs)) + 1
+            matrix = matrix.multiply(idf).tocsr()
+        if norm is not None:
+            matrix = matrix.astype(np.float64)
+            if norm == "l1":
+                row_norms = np.asarray(abs(matrix).sum(axis=1)).ravel()
+            elif norm == "l2":
+                row_norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+            else:
+                raise ValueError("norm must be 'l1', 'l2' or None")
+            row_norms[row_norms == 0] = 1
+            matrix = sparse.diags(1 / row_norms).dot(matrix).tocsr()
+        return matrix, self.vocab[columns]
+
+
+def load_or_build(filedir, prefix):
+    """Load the cached DTM for the .txt files in filedir, rebuilding it if they've changed."""
+    filenames = sorted(os.path.join(filedir, f) for f in os.listdir(filedir) if f.endswith(".txt"))
+    if os.path.exists(prefix + ".npz"):
+        dtm = DTM.load(prefix)
+        if dtm.manifest == _file_manifest(filenames):
+            return dtm
+    dtm = DTM.from_files(filenames)
+    dtm.save(prefix)
+    return dtm
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build (or refresh) the cached document-term matrix for a directory.")
+    parser.add_argument("filedir", help="directory of .txt files")
+    parser.add_argument("prefix", help="cache files are written as prefix.npz, prefix.vocab.txt, prefix.docs.tsv")
+    args = parser.parse_args()
+    dtm = load_or_build(args.filedir, args.prefix)
+    print("{} documents, {} words".format(*dtm.counts.shape))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""Match books against fan works with 6-grams, and aggregate the results.
+
+DSC 8 compares every book to the corpus with Scott Enderle's fandom-search
+code, running ``python ao3.py search fanworks scripts/$file`` once per book.
+That restarts Python and rebuilds the fan works index ~800 times. Here the
+fan works are indexed once: every 6-gram of lower-cased words gets a 64-bit
+rolling hash, and the hashes are stored as sorted NumPy arrays that workers
+memory-map and search with ``np.searchsorted``. Each book (the DSC 8
+"-script.txt" files, or plain .txt files) gets a results CSV with one row per
+matched word, including the ORIGINAL_SCRIPT_CHARACTER and FAN_WORK_FILENAME
+columns:
+
+    python -m dsc.fanworks index fandom-search-main/fanworks fanworks_index
+    python -m dsc.fanworks search fanworks_index fandom-search-main/scripts results --workers 8
+
+Each results CSV (from here or from ``ao3.py search``) has one row per matched word, with
+the book used as the basis of comparison in ORIGINAL_SCRIPT_CHARACTER and
+the book it matched in FAN_WORK_FILENAME. DSC 8 turns these into one table
+of (book, matched book, number of matched words) for Cytoscape. It calls
+``value_counts()`` once per row, which is quadratic in the size of the file,
+and it grows the table with ``pd.concat`` once per file. This module counts
+each file in a single pass and concatenates everything once at the end:
+
+    python -m dsc.fanworks aggregate /Users/qad/Documents/fandom-search-main/results 6gram_finaldata.csv
+    python -m dsc.fanworks aggregate results 6gram_finaldata.parquet --workers 8
+"""
+
+import argparse
+import csv
+import hashlib
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from dsc.normalize import normalize
+
+
+# Same column names as the fandom-search results and 6gram_finaldata.csv
+COLUMN_NAMES = ["ORIGINAL_SCRIPT_CHARACTER", "FAN_WORK_FILENAME", "matches_count"]
+RESULT_COLUMNS = ["ORIGINAL_SCRIPT_WORD_INDEX", "ORIGINAL_SCRIPT_WORD", "FAN_WORK_WORD_INDEX",
+                  "ORIGINAL_SCRIPT_CHARACTER", "FAN_WORK_FILENAME"]
+
+NGRAM_SIZE = 6
+TOKEN = re.compile(r"[\w']+")
+# The fake script format DSC 8 writes for each book
+SCRIPT_LINE = re.compile(r"CHARACTER_NAME<<(.*?)>>\s*LINE<<(.*?)>>", re.DOTALL)
+# Multiplier for the polynomial rolling hash (the 64-bit FNV prime)
+HASH_MULTIPLIER = np.uint64(0x100000001B3)
+
+
+def tokenize(text):
+    """Split text into words (letters, digits and apostrophes).
+
+    The text first gets DSC 8's script clean-up, so fan works and script
+    files split into the same words (e.g. "baby-sitter" is "babysitter" in both).
+    """
+    return TOKEN.findall(normalize(text, "script"))
+
+
+_token_hashes = {}
+
+
+def _token_hash(word):
+    # Stable across processes and runs, unlike hash()
+    value = _token_hashes.get(word)
+    if value is None:
+        value = int.from_bytes(hashlib.blake2b(word.encode("utf8"), digest_size=8).digest(), "little")
+        _token_hashes[word] = value
+    return value
+
+
+def ngram_hashes(words, n=NGRAM_SIZE):
+    """Return a uint64 hash for each n-gram of lower-cased words (len(words) - n + 1 of them)."""
+    if len(words) < n:
+        return np.zeros(0, dtype=np.uint64)
+    token_hashes = np.array([_token_hash(word.lower()) for word in words], dtype=np.uint64)
+    count = len(words) - n + 1
+    hashes = np.zeros(count, dtype=np.uint64)
+    # Horner's rule over the n positions, for every n-gram at once
+    # (uint64 arithmetic wraps around, which is what a rolling hash wants)
+    for j in range(n):
+        hashes = hashes * HASH_MULTIPLIER + token_hashes[j:j + count]
+    return hashes
+
+
+def _file_ngrams(job):
+    path, n = job
+    with open(path, encoding="utf8") as f:
+        return ngram_hashes(tokenize(f.read()), n)
+
+
+def build_index(fanworks_dir, index_dir, n=NGRAM_SIZE, workers=1):
+    """Hash every n-gram of every .txt file in fanworks_dir and save the index to index_dir.
+
+    The index is three parallel arrays sorted by hash (hashes.npy, docs.npy,
+    positions.npy), plus filenames.txt and ngram_size.npy.
+    """
+    filenames = sorted(f for f in os.listdir(fanworks_dir) if f.endswith(".txt"))
+    jobs = [(os.path.join(fanworks_dir, f), n) for f in filenames]
+    if workers == 1:
+        per_file = [_file_ngrams(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            per_file = list(executor.map(_file_ngrams, jobs))
+    hashes = np.concatenate(per_file) if per_file else np.zeros(0, dtype=np.uint64)
+    docs = np.repeat(np.arange(len(per_file), dtype=np.int32), [len(h) for h in per_file])
+    positions = np.concatenate([np.arange(len(h), dtype=np.int32) for h in per_file]) if per_file \
+        else np.zeros(0, dtype=np.int32)
+    order = np.argsort(hashes, kind="stable")
+    os.makedirs(index_dir, exist_ok=True)
+    np.save(os.path.join(index_dir, "hashes.npy"), hashes[order])
+    np.save(os.path.join(index_dir, "docs.npy"), docs[order])
+    np.save(os.path.join(index_dir, "positions.npy"), positions[order])
+    np.save(os.path.join(index_dir, "ngram_size.npy"), np.array(n))
+    with open(os.path.join(index_dir, "filenames.txt"), "w", encoding="utf8") as out:
+        for filename in filenames:
+            out.write(filename + "\n")
+    return len(hashes)
+
+
+class NgramIndex:
+    """A fan works index saved by build_index, memory-mapped so worker processes share it."""
+
+    def __init__(self, index_dir):
+        self.hashes = np.load(os.path.join(index_dir, "hashes.npy"), mmap_mode="r")
+        self.docs = np.load(os.path.join(index_dir, "docs.npy"), mmap_mode="r")
+        self.positions = np.load(os.path.join(index_dir, "positions.npy"), mmap_mode="r")
+        self.n = int(np.load(os.path.join(index_dir, "ngram_size.npy")))
+        with open(os.path.join(index_dir, "filenames.txt"), encoding="utf8") as f:
+            self.filenames = f.read().splitlines()
+
+    def match(self, words):
+        """Return an (m, 3) array of (fan work, word index, fan work word index) matches.
+
+        Every word of every shared n-gram is one row, so a word in several
+        overlapping n-grams is still only counted once. Rows are sorted by
+        fan work, then word index.
+        """
+        query = ngram_hashes(words, self.n)
+        lo = np.searchsorted(self.hashes, query, side="left")
+        hi = np.searchsorted(self.hashes, query, side="right")
+        counts = hi - lo
+        if counts.sum() == 0:
+            return np.zeros((0, 3), dtype=np.int64)
+        # Expand each [lo, hi) range of index rows into one entry per row
+        query_starts = np.repeat(np.arange(len(query)), counts)
+        firsts = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+        index_rows = firsts + np.arange(counts.sum())
+        docs = np.asarray(self.docs[index_rows], dtype=np.int64)
+        fan_starts = np.asarray(self.positions[index_rows], dtype=np.int64)
+        offsets = np.arange(self.n)
+        matches = np.stack([np.repeat(docs, self.n),
+                            (query_starts[:, None] + offsets).ravel(),
+                            (fan_starts[:, None] + offsets).ravel()], axis=1)
+        return np.unique(matches, axis=0)
+
+
+def read_script(text, filename):
+    """Return (character, line) pairs from a DSC 8 script file.
+
+    A plain text file counts as one line, with the filename as the character.
+    """
+    lines = SCRIPT_LINE.findall(text)
+    return lines if lines else [(filename, text)]
+
+
+# Each worker memory-maps the index once
+_index = None
+
+
+def _open_index(index_dir):
+    global _index
+    _index = NgramIndex(index_dir)
+
+
+def _search_script(job):
+    path, results_dir = job
+    filename = os.path.basename(path)
+    with open(path, encoding="utf8") as f:
+        text = f.read()
+    outfile = os.path.join(results_dir, os.path.splitext(filename)[0] + ".csv")
+    rows = 0
+    with open(outfile, "w", encoding="utf8", newline="") as out:
+        writer = csv.writer(out)
+        writer.writerow(RESULT_COLUMNS)
+        # Word indices count from the start of the file, across lines
+        start = 0
+        for character, line in read_script(text, filename):
+            words = tokenize(line)
+            for doc, word_index, fan_index in _index.match(words):
+                writer.writerow([start + word_index, words[word_index], fan_index,
+                                 character, _index.filenames[doc]])
+                rows += 1
+            start += len(words)
+    return filename, rows
+
+
+def search(index_dir, script_paths, results_dir, workers=1):
+    """Match each script file against the index, writing one results CSV per script.
+
+    Yields (script filename, number of matched words) as each one finishes.
+    """
+    os.makedirs(results_dir, exist_ok=True)
+    jobs = [(path, results_dir) for path in script_paths]
+    if workers == 1:
+        _open_index(index_dir)
+        yield from map(_search_script, jobs)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_open_index, initargs=(index_dir,)) as executor:
+        yield from executor.map(_search_script, jobs)
+
+
+def count_matches(df):
+    """Return one row per (book, matched book) with the number of matched words.
+
+    The same table DSC 8 builds: matches_count is how many rows (matched
+    words) each FAN_WORK_FILENAME has in df, and rows keep their original
+    index and order.
+    """
+    counts = df["FAN_WORK_FILENAME"].value_counts()
+    pairs = df[COLUMN_NAMES[:2]].drop_duplicates()
+    pairs["matches_count"] = pairs["FAN_WORK_FILENAME"].map(counts)
+    return pairs
+
+
+def _count_file(path):
+    # Only the two columns that get counted need to be read
+    return count_matches(pd.read_csv(path, usecols=COLUMN_NAMES[:2]))
+
+
+def aggregate_results(resultsdirectory, workers=1):
+    """Count the matches in every results CSV in resultsdirectory and return one DataFrame."""
+    paths = [os.path.join(resultsdirectory, file) for file in sorted(os.listdir(resultsdirectory))
+             if file.endswith(".csv")]
+    if workers == 1:
+        tables = [_count_file(path) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            tables = list(executor.map(_count_file, paths))
+    if not tables:
+        return pd.DataFrame(columns=COLUMN_NAMES)
+    return pd.concat(tables, axis=0)
+
+
+def write_finaldata(finaldata, outfile):
+    """Write the aggregated table as CSV (like DSC 8) or Parquet, going by the file extension."""
+    if outfile.endswith(".parquet"):
+        finaldata.to_parquet(outfile)
+    else:
+        finaldata.to_csv(outfile)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare books to fan works with 6-grams.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    index = subparsers.add_parser("index", help="build the n-gram index of a fan works directory")
+    index.add_argument("fanworks_dir", help="directory of .txt fan works")
+    index.add_argument("index_dir", help="directory to write the index to")
+    index.add_argument("-n", type=int, default=NGRAM_SIZE, help="words per n-gram")
+    index.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    search_parser = subparsers.add_parser("search", help="match script files against an index")
+    search_parser.add_argument("index_dir", help="index built with the index command")
+    search_parser.add_argument("scripts_dir", help="directory of script (or plain .txt) files")
+    search_parser.add_argument("results_dir", help="directory to write one results CSV per script to")
+    search_parser.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    aggregate = subparsers.add_parser("aggregate", help="aggregate fandom-search results CSVs")
+    aggregate.add_argument("resultsdirectory", help="directory of results CSV files")
+    aggregate.add_argument("outfile", help="6gram_finaldata.csv (or a .parquet file)")
+    aggregate.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    args = parser.parse_args()
+    if args.command == "index":
+        count = build_index(args.fanworks_dir, args.index_dir, args.n, args.workers)
+        print("Indexed {} n-grams".format(count))
+    elif args.command == "search":
+        scripts = sorted(os.path.join(args.scripts_dir, f) for f in os.listdir(args.scripts_dir)
+                         if f.endswith(".txt"))
+        for filename, rows in search(args.index_dir, scripts, args.results_dir, args.workers):
+            print(filename, rows)
+    elif args.command == "aggregate":
+        finaldata = aggregate_results(args.resultsdirectory, args.workers)
+        write_finaldata(finaldata, args.outfile)
+        print("Wrote {} rows".format(len(finaldata)))
+
+
+if __name__ == "__main__":
+    main()
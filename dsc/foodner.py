@@ -0,0 +1,131 @@
+"""Run the DSCM 4 food NER model over the whole corpus.
+
+The DSCM 4 notebook loads the food model and calls ``foodnlp(line)`` on one
+line at a time, for a single book. Each call pays spaCy's per-call overhead.
+This module streams every line of every book through
+``nlp.pipe(..., as_tuples=True)``, with batching and optional worker
+processes. Every component of the model runs except the ones that never
+find entities (parser, tagger, lemmatizer, attribute_ruler), so a model that
+uses a transformer or an entity_ruler tags the same entities as it would on
+its own. It writes one row per entity to a TSV of (book, line, start, end,
+label). line is the 0-based line number within the book, and start/end are
+character offsets within that line.
+
+A book's rows are written only when the whole book is done. Its name then
+goes into a ``.done`` file next to the output, with the size the output had
+once its rows were written. A run that stops partway can be started again:
+it cuts the output back to the last size in ``.done`` (dropping the rows of
+a book that was being written when it stopped) and skips the books it
+already finished:
+
+    python -m dsc.foodner /Users/qad/Downloads/foodmodel/dsc_food_model dsc_corpus_clean dsc-food-entities.tsv
+    python -m dsc.foodner dsc_food_model dsc_corpus_clean dsc-food-entities.tsv --n-process 4 --batch-size 256
+"""
+
+import argparse
+import csv
+import os
+
+from dsc.ner import load_ner_model
+
+
+COLUMNS = ["book", "line", "start", "end", "label"]
+
+
+def read_done(done_file):
+    """Return (books already finished, size of the output after the last of them) from the .done file.
+
+    A last line cut short by a crash is dropped from the file.
+    """
+    if not os.path.exists(done_file):
+        return set(), 0
+    with open(done_file, "rb+") as f:
+        data = f.read()
+        complete = data[:data.rfind(b"\n") + 1]
+        if len(complete) < len(data):
+            f.truncate(len(complete))
+    done, size = set(), 0
+    for line in complete.decode("utf8").splitlines():
+        book, size = line.rsplit("\t", 1)
+        done.add(book)
+    return done, int(size)
+
+
+def _book_lines(textdir, books):
+    # (line, (book, line number)) for spaCy's as_tuples; blank lines can't
+    # have entities, so they're skipped (but still counted)
+    for book in books:
+        with open(os.path.join(textdir, book), encoding="utf8") as f:
+            lines = f.read().splitlines()
+        for number, line in enumerate(lines):
+            if line.strip():
+                yield line, (book, number)
+        # An empty marker line, so every book reaches the loop below even
+        # when it has no text
+        yield "", (book, None)
+
+
+def food_entities(textdir, nlp, books, batch_size=128, n_process=1):
+    """Yield (book, rows) once each book is finished, where rows are (book, line, start, end, label)."""
+    rows = []
+    for doc, (book, number) in nlp.pipe(_book_lines(textdir, books), as_tuples=True,
+                                        batch_size=batch_size, n_process=n_process):
+        if number is None:
+            yield book, rows
+            rows = []
+            continue
+        for ent in doc.ents:
+            rows.append((book, number, ent.start_char, ent.end_char, ent.label_))
+
+
+def write_food_entities(textdir, nlp, outfile, batch_size=128, n_process=1):
+    """Write the entity TSV for every .txt file in textdir, resuming from outfile.done.
+
+    Returns the number of books processed in this run.
+    """
+    done_file = outfile + ".done"
+    done, size = read_done(done_file)
+    if not os.path.exists(outfile) or os.path.getsize(outfile) < size:
+        # The rows .done vouches for are gone, so start again
+        done, size = set(), 0
+        open(done_file, "w").close()
+    # Anything past the last finished book is from a book that wasn't
+    # finished (with nothing finished, that's the whole file)
+    with open(outfile, "ab") as f:
+        f.truncate(size)
+    books = sorted(f for f in os.listdir(textdir) if f.endswith(".txt") and f not in done)
+    count = 0
+    with open(outfile, "a", encoding="utf8", newline="") as out, open(done_file, "a", encoding="utf8") as done_out:
+        writer = csv.writer(out, delimiter="\t", lineterminator="\n")
+        if not done:
+            writer.writerow(COLUMNS)
+        for book, rows in food_entities(textdir, nlp, books, batch_size, n_process):
+            writer.writerows(rows)
+            out.flush()
+            os.fsync(out.fileno())
+            # Only mark the book done once its rows are safely written
+            done_out.write("{}\t{}\n".format(book, out.tell()))
+            done_out.flush()
+            os.fsync(done_out.fileno())
+            count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tag food entities in every line of every book.")
+    parser.add_argument("model", help="path to the food NER model (e.g. dsc_food_model)")
+    parser.add_argument("textdir", help="directory of .txt files")
+    parser.add_argument("outfile", help="TSV file to write (resumes if outfile.done exists)")
+    parser.add_argument("--batch-size", type=int, default=128, help="lines per nlp.pipe batch")
+    parser.add_argument("--n-process", type=int, default=1, help="number of spaCy worker processes")
+    parser.add_argument("--keep-pipes", nargs="+",
+                        help="model components to run (default: all but the parser, tagger, lemmatizer "
+                             "and attribute_ruler)")
+    args = parser.parse_args()
+    nlp = load_ner_model(args.model, keep=args.keep_pipes)
+    count = write_food_entities(args.textdir, nlp, args.outfile, args.batch_size, args.n_process)
+    print("Tagged {} books".format(count))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""Clean up a run of GPT-2 generations and compare them with the real chapter samples.
+
+DSC 9 renames each Colab run's files in one loop (``run5_`` prefixes, later
+``_run5.txt`` suffixes). A second loop runs ``word_tokenize`` over every
+generation, just to drop the ``======== SAMPLE 1 ========`` header (its first
+four tokens), and writes ``-c.txt`` files. This module does one pass per run
+directory. It reads each generation once, cuts the header off at the character
+offset where its fourth token ends, and writes the cleaned text under the
+notebook's naming convention. It also records every file's run and sample name
+in a manifest TSV. The directory of cleaned generations and real samples (see
+dsc.samples) can then go straight to dsc.dtm and dsc.distances for DSC 9's
+cosine-distance "Sum" ranking:
+
+    python -m dsc.generations clean /Users/qad/Downloads/ch2samples_run5 dsc9_gpt2comparison
+    python -m dsc.generations clean ch2samples_run6 dsc9_gpt2comparison --run run6 --rank dsc9_sums.csv
+    python -m dsc.generations rank dsc9_gpt2comparison dsc9_sums.csv --dtm dsc9_dtm
+    python -m dsc.generations clean ch2samples_run7 dsc9_gpt2comparison --rank dsc9_sums.csv --state dsc9_sums.npz
+"""
+
+import argparse
+import csv
+import os
+import re
+from itertools import islice
+
+import pandas as pd
+
+
+# word_tokenize splits "======== SAMPLE 1 ========" into four tokens
+PROMPT_TOKENS = 4
+PROMPT_TOKEN = re.compile(r"\S+")
+RUN_NAME = re.compile(r"run[0-9]+")
+MANIFEST_NAME = "manifest.tsv"
+MANIFEST_COLUMNS = ["filename", "run", "sample", "source", "characters"]
+
+
+def strip_prompt(text, tokens=PROMPT_TOKENS):
+    """Drop the first tokens of text (the sample header) by character offset."""
+    ends = [match.end() for match in islice(PROMPT_TOKEN.finditer(text), tokens)]
+    if len(ends) < tokens:
+        return ""
+    return text[ends[-1]:].lstrip()
+
+
+def run_name(run_dir):
+    """The run name in a run directory's name (ch2samples_run5 -> run5)."""
+    match = RUN_NAME.search(os.path.basename(os.path.normpath(run_dir)))
+    if match is None:
+        raise ValueError("No run number in {}; pass the run name explicitly".format(run_dir))
+    return match.group(0)
+
+
+def output_name(sample, run, naming="suffix"):
+    """The cleaned filename: samples-11_run5-c.txt, or run5_samples-11-c.txt with naming='prefix'."""
+    sample = sample[:-len(".txt")] if sample.endswith(".txt") else sample
+    if naming == "prefix":
+        return run + "_" + sample + "-c.txt"
+    # DSC 9's revised naming, so files sort by sample (training step) before run
+    return sample + "_" + run + "-c.txt"
+
+
+def clean_run(run_dir, outdir, run=None, naming="suffix", tokens=PROMPT_TOKENS):
+    """Clean every generation in run_dir into outdir; yields one manifest row per file."""
+    run = run or run_name(run_dir)
+    os.makedirs(outdir, exist_ok=True)
+    for sample in sorted(os.listdir(run_dir)):
+        source = os.path.join(run_dir, sample)
+        if sample.startswith(".") or not os.path.isfile(source):
+            continue
+        with open(source, encoding="utf8") as f:
+            cleaned = strip_prompt(f.read(), tokens)
+        filename = output_name(sample, run, naming)
+        with open(os.path.join(outdir, filename), "w", encoding="utf8") as out:
+            out.write(cleaned)
+        yield [filename, run, sample, source, len(cleaned)]
+
+
+def write_manifest(rows, manifest, run):
+    """Write the manifest rows for run, replacing any rows an earlier clean of the same run left."""
+    kept = []
+    if os.path.exists(manifest):
+        with open(manifest, encoding="utf8", newline="") as f:
+            kept = [row for row in csv.reader(f, delimiter="\t")][1:]
+        kept = [row for row in kept if row[1] != run]
+    with open(manifest, "w", encoding="utf8", newline="") as out:
+        writer = csv.writer(out, delimiter="\t", lineterminator="\n")
+        writer.writerow(MANIFEST_COLUMNS)
+        writer.writerows(kept)
+        count = 0
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def _text_files(filedir):
+    filenames = sorted(os.path.join(filedir, f) for f in os.listdir(filedir) if f.endswith(".txt"))
+    # The same keys dsc.dtm uses
+    return filenames, [os.path.basename(f).split(".")[0] for f in filenames]
+
+
+def rank_texts(filedir, dtm_prefix=None, max_features=1000, metric="cosine", state=None):
+    """DSC 9's comparison: each text's summed distance to every other text, most distant first.
+
+    Word frequencies are TfidfVectorizer(use_idf=False, norm='l1',
+    max_features=1000), taken from dsc.dtm (cached under dtm_prefix if
+    given). The distance sums come from dsc.distances without building the
+    n x n matrix.
+
+    With state (an .npz file), the frequencies and sums are kept between runs.
+    Later calls only score the texts in filedir that aren't ranked yet, against
+    the vocabulary chosen the first time. Delete the state file to choose the
+    vocabulary again from everything.
+    """
+    from dsc.distances import RunningSums
+
+    if state is not None and os.path.exists(state):
+        sums = RunningSums.load(state)
+        if sums.metric != metric:
+            raise ValueError("{} holds {} distances, not {}".format(state, sums.metric, metric))
+        filenames, keys = _text_files(filedir)
+        known = set(sums.keys)
+        new = [(f, key) for f, key in zip(filenames, keys) if key not in known]
+        if new:
+            if sums.vocab is None:
+                # A fresh fit would give columns that don't line up with the saved ones
+                raise ValueError("{} has no vocabulary to count new texts with; delete it to rebuild".format(state))
+            from sklearn.feature_extraction.text import TfidfVectorizer
+
+            vectorizer = TfidfVectorizer(input="filename", use_idf=False, norm="l1", vocabulary=sums.vocab)
+            sums.add(vectorizer.fit_transform([f for f, _ in new]), [key for _, key in new])
+            sums.save(state)
+    else:
+        from dsc.dtm import DTM, load_or_build
+
+        dtm = load_or_build(filedir, dtm_prefix) if dtm_prefix else DTM.from_files(_text_files(filedir)[0])
+        wordfreqs, vocab = dtm.view(max_features=max_features, norm="l1")
+        sums = RunningSums.build(wordfreqs, dtm.keys, metric, vocab)
+        if state is not None:
+            sums.save(state)
+    return sums.ranking().sort_values("Sum", ascending=False, kind="stable")
+
+
+def write_ranking(filedir, outfile, dtm_prefix=None, metric="cosine", n=10, state=None):
+    sums = rank_texts(filedir, dtm_prefix, metric=metric, state=state)
+    sums.to_csv(outfile)
+    print("Most distant:")
+    print(sums.nlargest(n, "Sum"))
+    print("Least distant:")
+    print(sums.nsmallest(n, "Sum"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Clean GPT-2 generations and rank them against real samples.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    clean = subparsers.add_parser("clean", help="strip the sample headers from one run's generations")
+    clean.add_argument("run_dir", help="directory of one run's generations, as downloaded from Colab")
+    clean.add_argument("outdir", help="directory to write the -c.txt files and manifest.tsv to")
+    clean.add_argument("--run", help="run name (default: runN from the directory name)")
+    clean.add_argument("--naming", choices=("suffix", "prefix"), default="suffix",
+                       help="samples-11_run5-c.txt (suffix) or run5_samples-11-c.txt (prefix)")
+    clean.add_argument("--rank", help="then rank everything in outdir, writing the sums to this CSV")
+    clean.add_argument("--dtm", help="dsc.dtm cache prefix for the ranking")
+    clean.add_argument("--state", help=".npz file of running sums, so only the new generations are scored")
+    rank = subparsers.add_parser("rank", help="rank texts by their summed distance to all the others")
+    rank.add_argument("filedir", help="directory of real samples and cleaned generations")
+    rank.add_argument("outfile", help="CSV file of summed distances")
+    rank.add_argument("--dtm", help="dsc.dtm cache prefix, to avoid recounting unchanged files")
+    rank.add_argument("--state", help=".npz file of running sums, so only texts not yet ranked are scored")
+    for sub in (clean, rank):
+        sub.add_argument("--metric", choices=("cosine", "euclidean"), default="cosine")
+    args = parser.parse_args()
+    if args.command == "clean":
+        run = args.run or run_name(args.run_dir)
+        rows = clean_run(args.run_dir, args.outdir, run, args.naming)
+        count = write_manifest(rows, os.path.join(args.outdir, MANIFEST_NAME), run)
+        print("Cleaned {} generations from {}".format(count, run))
+        if args.rank:
+            write_ranking(args.outdir, args.rank, args.dtm, args.metric, state=args.state)
+    elif args.command == "rank":
+        write_ranking(args.filedir, args.outfile, args.dtm, args.metric, state=args.state)
+
+
+if __name__ == "__main__":
+    main()
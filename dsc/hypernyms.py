@@ -0,0 +1,198 @@
+"""A precomputed WordNet hypernym index, for finding every word under a category like food.
+
+DSCM 4 finds food words by looking up each noun in WordNet. For every
+synset it follows the first hypernym up ten hand-nested levels, writes the
+hypernym lists out as text, and then searches that text for ``'food.``. It
+calls ``wn.synsets()`` again for every definition. This module walks WordNet
+once and saves, for every noun synset, all of its ancestors at any depth as
+integer ids in a CSR array (``indptr``/``indices``, like scipy.sparse). It
+also saves which synsets each lemma belongs to. Checking whether a word is
+under food.n.01 or food.n.02 is then a dict lookup into a precomputed
+boolean array, and any other category works the same way:
+
+    python -m dsc.hypernyms build wordnet_hypernyms.npz
+    python -m dsc.hypernyms terms wordnet_hypernyms.npz dsc_nouns food-terms-clean.csv
+    python -m dsc.hypernyms terms wordnet_hypernyms.npz dsc_nouns clothing-terms-clean.csv --category clothing.n.01
+
+    from dsc.hypernyms import HypernymIndex
+    index = HypernymIndex.load('wordnet_hypernyms.npz')
+    food = index.lemmas_under(['food.n.01', 'food.n.02'])
+    'pizza' in food
+
+Unlike the notebook, every hypernym path counts (not just the first
+hypernym at each level), there's no depth limit, and a synset counts as being
+under itself.
+"""
+
+import argparse
+import os
+
+import numpy as np
+
+
+FOOD_CATEGORIES = ("food.n.01", "food.n.02")
+
+
+def build_closure(parents):
+    """Return CSR (indptr, indices) of every synset's ancestors, itself included.
+
+    parents is a list with the list of parent ids for each synset id.
+    """
+    closures = [None] * len(parents)
+    for start in range(len(parents)):
+        if closures[start] is not None:
+            continue
+        # Iterative depth-first walk, so deep hierarchies can't hit the recursion limit
+        stack = [start]
+        while stack:
+            node = stack[-1]
+            pending = [p for p in parents[node] if closures[p] is None]
+            if pending:
+                stack.extend(pending)
+                continue
+            stack.pop()
+            if closures[node] is None:
+                ancestors = {node}
+                for p in parents[node]:
+                    ancestors.update(closures[p])
+                closures[node] = ancestors
+    lengths = np.array([len(c) for c in closures], dtype=np.int64)
+    indptr = np.zeros(len(parents) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+    indices = np.fromiter((i for c in closures for i in sorted(c)), dtype=np.int32, count=int(indptr[-1]))
+    return indptr, indices
+
+
+class HypernymIndex:
+    """Noun synset names, their ancestor closure (CSR) and the lemma -> synsets map (CSR)."""
+
+    def __init__(self, names, indptr, indices, lemmas, lemma_indptr, lemma_synsets):
+        self.names = np.asarray(names, dtype=str)
+        self.indptr = np.asarray(indptr)
+        self.indices = np.asarray(indices)
+        self.lemmas = np.asarray(lemmas, dtype=str)
+        self.lemma_indptr = np.asarray(lemma_indptr)
+        self.lemma_synsets = np.asarray(lemma_synsets)
+        self._synset_ids = {name: i for i, name in enumerate(self.names)}
+        self._lemma_ids = {lemma: i for i, lemma in enumerate(self.lemmas)}
+
+    @classmethod
+    def from_wordnet(cls, wn=None):
+        """Walk every noun synset in WordNet (nltk.corpus.wordnet by default)."""
+        if wn is None:
+            from nltk.corpus import wordnet as wn
+        synsets = list(wn.all_synsets("n"))
+        ids = {synset.name(): i for i, synset in enumerate(synsets)}
+        parents = [[ids[h.name()] for h in synset.hypernyms()] for synset in synsets]
+        indptr, indices = build_closure(parents)
+        # Lemmas are lower-cased, to match the notebook's lower-cased lemmas
+        by_lemma = {}
+        for i, synset in enumerate(synsets):
+            for lemma in synset.lemma_names():
+                ids_for_lemma = by_lemma.setdefault(lemma.lower(), [])
+                if i not in ids_for_lemma:
+                    ids_for_lemma.append(i)
+        lemmas = sorted(by_lemma)
+        lemma_indptr = np.zeros(len(lemmas) + 1, dtype=np.int64)
+        np.cumsum([len(by_lemma[lemma]) for lemma in lemmas], out=lemma_indptr[1:])
+        lemma_synsets = np.array([i for lemma in lemmas for i in by_lemma[lemma]], dtype=np.int32)
+        return cls([s.name() for s in synsets], indptr, indices, lemmas, lemma_indptr, lemma_synsets)
+
+    def save(self, path):
+        np.savez_compressed(path, names=self.names, indptr=self.indptr, indices=self.indices,
+                            lemmas=self.lemmas, lemma_indptr=self.lemma_indptr,
+                            lemma_synsets=self.lemma_synsets)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["names"], data["indptr"], data["indices"],
+                       data["lemmas"], data["lemma_indptr"], data["lemma_synsets"])
+
+    def ancestors(self, synset_name):
+        """Names of every synset above synset_name (and synset_name itself)."""
+        i = self._synset_ids[synset_name]
+        return self.names[self.indices[self.indptr[i]:self.indptr[i + 1]]].tolist()
+
+    def synset_mask(self, categories):
+        """Boolean array over synsets: True for every synset under any of the categories."""
+        category_ids = [self._synset_ids[name] for name in categories]
+        rows = np.repeat(np.arange(len(self.names)), np.diff(self.indptr))
+        mask = np.zeros(len(self.names), dtype=bool)
+        mask[rows[np.isin(self.indices, category_ids)]] = True
+        return mask
+
+    def lemma_mask(self, categories):
+        """Boolean array over lemmas: True if any synset of the lemma is under a category."""
+        under = self.synset_mask(categories)[self.lemma_synsets].astype(np.int64)
+        # Number of each lemma's synsets that are under a category
+        counts = np.add.reduceat(under, self.lemma_indptr[:-1]) if len(under) else np.zeros(0, np.int64)
+        counts[np.diff(self.lemma_indptr) == 0] = 0
+        return counts > 0
+
+    def lemmas_under(self, categories=FOOD_CATEGORIES):
+        """Return a LemmaSet to check lemmas against the categories in O(1)."""
+        return LemmaSet(self._lemma_ids, self.lemma_mask(categories))
+
+
+class LemmaSet:
+    """The lemmas under some categories: ``lemma in lemma_set`` is a dict lookup and an array index."""
+
+    def __init__(self, lemma_ids, mask):
+        self._lemma_ids = lemma_ids
+        self.mask = mask
+
+    def __contains__(self, lemma):
+        i = self._lemma_ids.get(lemma.lower())
+        return i is not None and bool(self.mask[i])
+
+
+def read_noun_lemmas(nouns_dir):
+    """Lemmatize and lower-case the words in dsc.nouns's -nouns.txt files, like DSCM 4."""
+    from nltk.stem import WordNetLemmatizer
+
+    lemmatizer = WordNetLemmatizer()
+    lemmas = set()
+    for filename in sorted(os.listdir(nouns_dir)):
+        if filename.endswith(".txt"):
+            with open(os.path.join(nouns_dir, filename), encoding="utf8") as f:
+                # Lemmatize each distinct word once, however often it appears
+                for noun in set(f.read().split()):
+                    lemmas.add(lemmatizer.lemmatize(noun).lower())
+    return lemmas
+
+
+def write_terms(lemmas, lemma_set, outfile):
+    """Write the lemmas under the categories like food-terms-clean.csv (' word ' per line)."""
+    terms = sorted(lemma for lemma in lemmas if lemma in lemma_set)
+    with open(outfile, "w", encoding="utf8") as out:
+        for term in terms:
+            # The spaces stop later searches matching inside other words ('pear' in 'appear')
+            out.write(" " + term + " \n")
+    return len(terms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the words under a WordNet category, like food.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="precompute the hypernym index from WordNet")
+    build.add_argument("index", help=".npz file to write")
+    terms = subparsers.add_parser("terms", help="write the corpus nouns that are under the categories")
+    terms.add_argument("index", help=".npz file written by build")
+    terms.add_argument("nouns_dir", help="directory of -nouns.txt files (see dsc.nouns)")
+    terms.add_argument("outfile", help="e.g. food-terms-clean.csv")
+    terms.add_argument("--category", action="append", help="synset name; default food.n.01 and food.n.02")
+    args = parser.parse_args()
+    if args.command == "build":
+        index = HypernymIndex.from_wordnet()
+        index.save(args.index)
+        print("Indexed {} synsets and {} lemmas".format(len(index.names), len(index.lemmas)))
+    elif args.command == "terms":
+        index = HypernymIndex.load(args.index)
+        lemma_set = index.lemmas_under(args.category or FOOD_CATEGORIES)
+        count = write_terms(read_noun_lemmas(args.nouns_dir), lemma_set, args.outfile)
+        print("Wrote {} terms".format(count))
+
+
+if __name__ == "__main__":
+    main()
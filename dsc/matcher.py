@@ -0,0 +1,201 @@
+"""Find every occurrence of a long list of terms in one pass over each line.
+
+DSCM 4's aligned-translation food search runs ``any(food in line for food in
+foods)`` on every English line. That is one substring scan per food word per
+line. It then calls ``enlines.index(line)`` to find the aligned translation,
+which rescans the book and returns the first copy of a repeated line. DSC 19's
+word finder has the same shape. ``TermMatcher`` builds an Aho-Corasick
+automaton (a trie of the terms with failure links) from the whole term list,
+so each line is read once, one character at a time, however many terms there
+are, and overlapping terms are all found. Lines are paired with their
+translations by position.
+
+    python -m dsc.matcher aligned dsc-food-terms.csv french_aligned french
+    python -m dsc.matcher aligned dsc-food-terms.csv french_aligned french --matches dsc-french-food-matches.tsv
+    python -m dsc.matcher words dsc_corpus_clean word-finder-results.tsv pizza " burger " " skirt "
+
+The first writes ``dsc-french-food.csv`` in the DSCM 4 format. The second
+also writes every matched term, with its character offset in the English
+line and the aligned translation.
+"""
+
+import argparse
+import csv
+import os
+from collections import deque
+from contextlib import ExitStack
+
+from dsc.normalize import normalize
+
+
+class TermMatcher:
+    """All occurrences of any of a list of terms, with an Aho-Corasick automaton.
+
+    Terms are matched as exact substrings (case-sensitive, spaces included), so
+    DSCM 4's " pear " still doesn't match "appear".
+    """
+
+    def __init__(self, terms):
+        self.terms = list(dict.fromkeys(t for t in terms if t))
+        # The trie: node 0 is the root, and each node has {character: child node}
+        # and the terms that end there
+        self._goto = [{}]
+        self._out = [[]]
+        for term in self.terms:
+            node = 0
+            for ch in term:
+                child = self._goto[node].get(ch)
+                if child is None:
+                    child = len(self._goto)
+                    self._goto[node][ch] = child
+                    self._goto.append({})
+                    self._out.append([])
+                node = child
+            self._out[node].append(term)
+        # Failure links, breadth first: each node falls back to the longest
+        # proper suffix of its string that is also in the trie, and also
+        # reports the terms that end at that suffix
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0) if node else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def _ends(self, text):
+        # (index of the last character, terms ending there) for every match
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                yield i, out[node]
+
+    def finditer(self, text):
+        """Yield (offset, term) for every occurrence of every term, in order of offset.
+
+        Terms found at the same offset come longest first.
+        """
+        found = [(end + 1 - len(term), term) for end, terms in self._ends(text) for term in terms]
+        found.sort(key=lambda match: (match[0], -len(match[1])))
+        return iter(found)
+
+    def search(self, text):
+        """True if any term occurs in text."""
+        return next(self._ends(text), None) is not None
+
+
+def read_terms(path):
+    """Read a term list like food-terms-clean.csv, one term per line (spaces kept)."""
+    with open(path, encoding="utf8") as f:
+        return f.read().splitlines()
+
+
+def aligned_matches(directory, matcher):
+    """Yield (translation filename, line number, term, offset, English line, translated line).
+
+    Pairs each Bleualign ``-t.txt`` (English) file with its ``-s.txt``
+    translation, line by line.
+    """
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith("-t.txt"):
+            continue
+        langname = filename.replace("-t.txt", "-s.txt")
+        with open(os.path.join(directory, filename), encoding="utf8") as enf:
+            enlines = enf.read().splitlines()
+        with open(os.path.join(directory, langname), encoding="utf8") as langf:
+            langlines = langf.read().splitlines()
+        for linenum, line in enumerate(enlines):
+            # Missing lines at the end of a translation count as empty
+            langline = langlines[linenum] if linenum < len(langlines) else ""
+            for offset, term in matcher.finditer(line):
+                yield langname, linenum, term, offset, line, langline
+
+
+def write_aligned_search(directory, terms, lang, outdir=".", matches_file=None):
+    """Write dsc-<lang>-food.csv (one row per matching English line) like DSCM 4.
+
+    With matches_file, also write a TSV of every matched term with its
+    offset. Returns the number of matching lines.
+    """
+    matcher = TermMatcher(terms)
+    lines = 0
+    with ExitStack() as stack:
+        out = stack.enter_context(open(os.path.join(outdir, "dsc-" + lang + "-food.csv"), "w", encoding="utf8"))
+        out.write("file, english, " + lang + "\n")
+        matches_writer = None
+        if matches_file:
+            matches_out = stack.enter_context(open(matches_file, "w", encoding="utf8", newline=""))
+            matches_writer = csv.writer(matches_out, delimiter="\t", lineterminator="\n")
+            matches_writer.writerow(["file", "line", "term", "offset", "english", lang])
+        last_line = None
+        for langname, linenum, term, offset, line, langline in aligned_matches(directory, matcher):
+            if (langname, linenum) != last_line:
+                # Commas and quotation marks would mess up the CSV output
+                out.write(langname + ", " + normalize(line, "csv") + ", " + normalize(langline, "csv") + "\n")
+                last_line = (langname, linenum)
+                lines += 1
+            if matches_writer is not None:
+                matches_writer.writerow([langname, linenum, term, offset, line, langline])
+    return lines
+
+
+def write_word_finder(bookdir, words, outfile):
+    """DSC 19's word finder: write (book, word, sentence) for each word found in each sentence.
+
+    Sentences are lower-cased and have newlines and quotes removed before
+    searching, as in DSC 19. Returns the number of rows written.
+    """
+    from nltk.tokenize import sent_tokenize
+
+    matcher = TermMatcher(words)
+    rows = 0
+    with open(outfile, "w", encoding="utf8") as out:
+        out.write("book\tword\tsentence\n")
+        for book in sorted(os.listdir(bookdir)):
+            if not book.endswith(".txt"):
+                continue
+            with open(os.path.join(bookdir, book), encoding="utf8") as f:
+                booktext = f.read()
+            for sentence in sent_tokenize(booktext):
+                sentence = normalize(sentence, "words")
+                found = {term for _, term in matcher.finditer(sentence)}
+                # One row per word, in the order of the word list
+                for word in matcher.terms:
+                    if word in found:
+                        out.write(book + "\t" + word + "\t" + sentence + "\n")
+                        rows += 1
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search texts for a list of terms.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    aligned = subparsers.add_parser("aligned", help="search aligned English/translation files (DSCM 4)")
+    aligned.add_argument("terms", help="term list, one per line (e.g. dsc-food-terms.csv)")
+    aligned.add_argument("directory", help="directory of Bleualign -t.txt/-s.txt files")
+    aligned.add_argument("lang", help="name of the translation language, for the output filename")
+    aligned.add_argument("--outdir", default=".", help="where to write dsc-<lang>-food.csv")
+    aligned.add_argument("--matches", help="also write every matched term and offset to this TSV")
+    words = subparsers.add_parser("words", help="DSC 19's word finder")
+    words.add_argument("bookdir", help="directory of .txt files")
+    words.add_argument("outfile", help="TSV file to write")
+    words.add_argument("words", nargs="+", help="words to look for (quote them to keep spaces)")
+    args = parser.parse_args()
+    if args.command == "aligned":
+        count = write_aligned_search(args.directory, read_terms(args.terms), args.lang, args.outdir, args.matches)
+        print("Found {} matching lines".format(count))
+    elif args.command == "words":
+        count = write_word_finder(args.bookdir, args.words, args.outfile)
+        print("Wrote {} rows".format(count))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""Most distinctive words (MDWs) and stepwise LDA feature selection, without R.
+
+The DSC 15 Ilana analysis runs Mark's R code through rpy2: ``fullClean``
+(which splits every quote into single characters), a ``tm``
+DocumentTermMatrix, ``allMDW``/``qdMDWs`` (one ``fisher.test`` per word per
+group) and ``klaR::stepclass(method="lda")``. This module does the same steps
+in Python. Cleaning is one regex, the DTM stays sparse, and the Fisher's exact
+(or chi-square) test runs on every word's 2x2 table at once. Stepwise LDA adds
+one word at a time by Wilks' lambda, updating the covariance inverses
+incrementally rather than refitting.
+
+    python -m dsc.mdw mdw ilana_quotes.csv CorpusMDWs.csv --alpha 0.05
+    python -m dsc.mdw stepwise ilana_quotes.csv ilana_stepwise.csv -n 75
+
+The input CSV has a Text column and a Group column (e.g. Ilana / nonIlana).
+CorpusMDWs.csv has the same columns as the R version: Term, Obs, ObsScaled,
+Obs_Exp, pValue, Rank and Group.
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+from scipy import sparse, stats
+from sklearn.feature_extraction.text import CountVectorizer
+
+from dsc.typicality import NOT_A_LETTER, top_terms
+
+
+# tm's stopwords("en")
+TM_STOPWORDS = (
+    "i", "me", "my", "myself", "we", "our", "ours", "ourselves", "you", "your", "yours", "yourself",
+    "yourselves", "he", "him", "his", "himself", "she", "her", "hers", "herself", "it", "its", "itself",
+    "they", "them", "their", "theirs", "themselves", "what", "which", "who", "whom", "this", "that",
+    "these", "those", "am", "is", "are", "was", "were", "be", "been", "being", "have", "has", "had",
+    "having", "do", "does", "did", "doing", "would", "should", "could", "ought", "i'm", "you're", "he's",
+    "she's", "it's", "we're", "they're", "i've", "you've", "we've", "they've", "i'd", "you'd", "he'd",
+    "she'd", "we'd", "they'd", "i'll", "you'll", "he'll", "she'll", "we'll", "they'll", "isn't", "aren't",
+    "wasn't", "weren't", "hasn't", "haven't", "hadn't", "doesn't", "don't", "didn't", "won't", "wouldn't",
+    "shan't", "shouldn't", "can't", "cannot", "couldn't", "mustn't", "let's", "that's", "who's", "what's",
+    "here's", "there's", "when's", "where's", "why's", "how's", "a", "an", "the", "and", "but", "if", "or",
+    "because", "as", "until", "while", "of", "at", "by", "for", "with", "about", "against", "between",
+    "into", "through", "during", "before", "after", "above", "below", "to", "from", "up", "down", "in",
+    "out", "on", "off", "over", "under", "again", "further", "then", "once", "here", "there", "when",
+    "where", "why", "how", "all", "any", "both", "each", "few", "more", "most", "other", "some", "such",
+    "no", "nor", "not", "only", "own", "same", "so", "than", "too", "very")
+
+MDW_COLUMNS = ["Term", "Obs", "ObsScaled", "Obs_Exp", "pValue", "Rank", "Group"]
+
+# fisher.test counts tables as extreme as the observed one up to this relative error
+FISHER_REL_ERR = 1 + 1e-7
+
+
+def full_clean(text):
+    """Mark's fullClean: lower-case, and keep only letters and spaces."""
+    return NOT_A_LETTER.sub("", text.lower())
+
+
+def document_term_matrix(texts, remove_stopwords=False):
+    """Sparse counts of the words in the cleaned texts, like tm's DTM with wordLengths=c(1,Inf).
+
+    Returns (counts, vocab); the columns are alphabetical, like tm's.
+    """
+    # After full_clean, stopwords with apostrophes can't match anything
+    stop_words = [w for w in TM_STOPWORDS if w.isalpha()] if remove_stopwords else None
+    vectorizer = CountVectorizer(lowercase=False, token_pattern=r"[a-z]+", stop_words=stop_words)
+    counts = vectorizer.fit_transform(full_clean(text) for text in texts)
+    return counts.tocsr(), vectorizer.get_feature_names_out()
+
+
+def fisher_two_sided(a, b, c, d):
+    """Two-sided Fisher's exact test p-values for many 2x2 tables [[a, b], [c, d]] at once.
+
+    Follows R's fisher.test: sum the probability of every table (with the
+    same margins) that is no more likely than the observed one.
+    """
+    a, b, c, d = (np.asarray(x, dtype=np.int64) for x in (a, b, c, d))
+    # a is hypergeometric: draws = a + b from total with a + c successes
+    total, successes, draws = a + b + c + d, a + c, a + b
+    lo = np.maximum(0, draws - (b + d))
+    hi = np.minimum(draws, successes)
+    dist = stats.hypergeom(total, successes, draws)
+    threshold = dist.logpmf(a) + np.log(FISHER_REL_ERR)
+    mode = np.clip(((draws + 1) * (successes + 1)) // (total + 2), lo, hi)
+
+    def search(left, right, rising):
+        # Binary search over [left, right] on each side of the mode: the
+        # last k with pmf <= threshold while rising, the first one while falling
+        left, right = left.copy(), right.copy()
+        while np.any(left < right):
+            middle = (left + right + (1 if rising else 0)) // 2
+            ok = dist.logpmf(middle) <= threshold
+            if rising:
+                left, right = np.where(ok, middle, left), np.where(ok, right, middle - 1)
+            else:
+                left, right = np.where(ok, left, middle + 1), np.where(ok, middle, right)
+        return left
+
+    # Lower tail: [lo, upper_end]; upper tail: [lower_start, hi]
+    upper_end = search(lo - 1, mode, rising=True)
+    lower_start = search(mode, hi + 1, rising=False)
+    p = dist.cdf(upper_end) + dist.sf(lower_start - 1)
+    # Mode included in a tail means every table counts; so does an empty table,
+    # where scipy's hypergeom gives NaN
+    return np.minimum(1.0, np.where((upper_end >= lower_start) | (total == 0), 1.0, p))
+
+
+def chisq_p(a, b, c, d):
+    """Chi-square test p-values (with Yates' correction, like chisq.test) for many 2x2 tables."""
+    cells = np.stack([a, b, c, d]).astype(float)
+    total = cells.sum(axis=0)
+    rows = np.stack([cells[0] + cells[1], cells[0] + cells[1], cells[2] + cells[3], cells[2] + cells[3]])
+    cols = np.stack([cells[0] + cells[2], cells[1] + cells[3], cells[0] + cells[2], cells[1] + cells[3]])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        expected = rows * cols / total
+        yates = np.minimum(0.5, np.abs(cells - expected))
+        statistic = ((np.abs(cells - expected) - yates) ** 2 / expected).sum(axis=0)
+    return stats.chi2.sf(statistic, 1)
+
+
+def group_mdws(counts, vocab, target, alpha=0.05, test="fisher"):
+    """qdMDWs: the words significantly over-represented in the target rows.
+
+    counts is the sparse DTM, target a boolean row mask. Returns a DataFrame
+    with Term, Obs, ObsScaled, Obs_Exp, pValue and Rank, sorted by ObsScaled.
+    """
+    target_sub = np.asarray(counts[np.flatnonzero(target)].sum(axis=0)).ravel()
+    total_obs = np.asarray(counts.sum(axis=0)).ravel()
+    target_words = target_sub.sum()
+    # np.round rounds halves to even, like R's round()
+    target_exp = np.round(total_obs / total_obs.sum() * target_words)
+    keep = np.flatnonzero(target_sub - target_exp > 0)
+    obs, expected = target_sub[keep], target_exp[keep]
+    test_p = fisher_two_sided if test == "fisher" else chisq_p
+    p_values = test_p(obs, expected, target_words - obs, target_words - expected)
+    sig = np.flatnonzero(p_values < alpha)
+    table = pd.DataFrame({
+        "Term": vocab[keep[sig]],
+        "Obs": obs[sig],
+        "ObsScaled": obs[sig] / target_words,
+        "Obs_Exp": obs[sig] / expected[sig],
+        "pValue": p_values[sig],
+    })
+    table = table.iloc[np.argsort(-table["ObsScaled"].to_numpy(), kind="stable")].reset_index(drop=True)
+    table["Rank"] = np.arange(1, len(table) + 1)
+    return table
+
+
+def all_mdws(counts, vocab, groups, alpha=0.05, test="fisher"):
+    """allMDW: the MDW table for each group in turn (in order of first appearance), stacked."""
+    groups = np.asarray(groups)
+    tables = []
+    for group in pd.unique(groups):
+        table = group_mdws(counts, vocab, groups == group, alpha, test)
+        print("{}: {} significant MDWs".format(group, len(table)))
+        if len(table):
+            table["Group"] = group
+            tables.append(table)
+    if not tables:
+        return pd.DataFrame(columns=MDW_COLUMNS)
+    return pd.concat(tables, ignore_index=True)
+
+
+def drop_empty(counts, *columns):
+    """Drop the texts with no words left after cleaning (and the matching metadata)."""
+    keep = np.flatnonzero(np.asarray(counts.sum(axis=1)).ravel() > 0)
+    return (counts[keep],) + tuple(np.asarray(column)[keep] for column in columns)
+
+
+def feature_table(counts, vocab, n):
+    """Relative frequencies of the n most frequent words, columns in alphabetical order."""
+    terms = top_terms(counts, vocab, n)
+    columns = np.flatnonzero(np.isin(vocab, terms))
+    row_sums = np.asarray(counts.sum(axis=1)).ravel().astype(float)
+    return sparse.diags(1 / row_sums).dot(counts[:, columns]).toarray(), vocab[columns]
+
+
+def _sscp(X, groups):
+    # Total and pooled within-group sums of squares and cross-products
+    centred = X - X.mean(axis=0)
+    total = centred.T @ centred
+    within = np.zeros_like(total)
+    for group in np.unique(groups):
+        rows = X[groups == group]
+        rows = rows - rows.mean(axis=0)
+        within += rows.T @ rows
+    return within, total
+
+
+def stepwise_lda(X, groups, feature_names, p_enter=0.05, max_vars=None, tol=1e-10):
+    """Forward stepwise feature selection for LDA by Wilks' lambda.
+
+    At each step, add the feature that lowers Wilks' lambda (det W / det T)
+    the most, as long as its partial F to enter is significant (p-value below
+    p_enter, like SPSS's PIN). Adding feature j multiplies lambda by the
+    ratio of the Schur complements of W and T, which is computed for every
+    candidate at once from the current inverses. Those inverses are then grown by one row
+    and column, with no refit. Returns a DataFrame of the steps (feature,
+    Wilks' lambda, partial F to enter and its p-value).
+
+    This is the classic stepwise discriminant analysis rather than klaR's
+    cross-validated correctness rate, so its choices don't depend on random
+    folds.
+    """
+    X = np.asarray(X, dtype=float)
+    groups = np.asarray(groups)
+    n, p = X.shape
+    g = len(np.unique(groups))
+    W, T = _sscp(X, groups)
+    max_vars = p if max_vars is None else max_vars
+    selected = []
+    W_inv = np.zeros((0, 0))
+    T_inv = np.zeros((0, 0))
+    wilks = 1.0
+    steps = []
+    while len(selected) < min(max_vars, p, n - g - 1):
+        S = selected
+        # Schur complements of every candidate column given the selected ones
+        schur_w = np.diag(W) - np.einsum("ij,ij->j", W[S], W_inv @ W[S]) if S else np.diag(W).copy()
+        schur_t = np.diag(T) - np.einsum("ij,ij->j", T[S], T_inv @ T[S]) if S else np.diag(T).copy()
+        valid = schur_t > tol * np.maximum(np.diag(T), tol)
+        valid[S] = False
+        if not valid.any():
+            break
+        partial = np.full(p, np.inf)
+        partial[valid] = schur_w[valid] / schur_t[valid]
+        j = int(np.argmin(partial))
+        df1, df2 = g - 1, n - g - len(S)
+        f_to_enter = (1 - partial[j]) / partial[j] * df2 / df1
+        p_value = stats.f.sf(f_to_enter, df1, df2)
+        if not p_value < p_enter:
+            break
+        wilks *= partial[j]
+        steps.append((feature_names[j], wilks, f_to_enter, p_value))
+        W_inv = _grow_inverse(W_inv, W, S, j, schur_w[j])
+        T_inv = _grow_inverse(T_inv, T, S, j, schur_t[j])
+        selected.append(j)
+    return pd.DataFrame(steps, columns=["feature", "wilks_lambda", "f_to_enter", "p_value"])
+
+
+def _grow_inverse(A_inv, A, S, j, schur):
+    # Inverse of A[S+j, S+j] from the inverse of A[S, S] (block inversion)
+    if not S:
+        return np.array([[1 / schur]])
+    u = A_inv @ A[S, j]
+    grown = np.empty((len(S) + 1, len(S) + 1))
+    grown[:-1, :-1] = A_inv + np.outer(u, u) / schur
+    grown[:-1, -1] = grown[-1, :-1] = -u / schur
+    grown[-1, -1] = 1 / schur
+    return grown
+
+
+def read_quotes(path, text_column="Text", group_column="Group"):
+    table = pd.read_csv(path)
+    return table[text_column].astype(str).tolist(), table[group_column].tolist()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Most distinctive words and stepwise LDA for grouped texts.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    mdw = subparsers.add_parser("mdw", help="write the MDWs for each group (CorpusMDWs.csv)")
+    mdw.add_argument("infile", help="CSV with a text column and a group column")
+    mdw.add_argument("outfile", help="e.g. CorpusMDWs.csv")
+    mdw.add_argument("--alpha", type=float, default=0.05, help="significance cut-off")
+    mdw.add_argument("--test", choices=("fisher", "chisq"), default="fisher")
+    mdw.add_argument("--keep-stopwords", action="store_true", help="don't remove tm's English stopwords")
+    step = subparsers.add_parser("stepwise", help="stepwise LDA over the most frequent words")
+    step.add_argument("infile", help="CSV with a text column and a group column")
+    step.add_argument("outfile", help="CSV of the selection steps")
+    step.add_argument("-n", type=int, default=75, help="number of most frequent words to choose from")
+    step.add_argument("--p-enter", type=float, default=0.05, help="largest p-value of the F to enter")
+    step.add_argument("--remove-stopwords", action="store_true", help="remove tm's English stopwords first")
+    for sub in (mdw, step):
+        sub.add_argument("--text-column", default="Text")
+        sub.add_argument("--group-column", default="Group")
+    args = parser.parse_args()
+    texts, groups = read_quotes(args.infile, args.text_column, args.group_column)
+    if args.command == "mdw":
+        counts, vocab = document_term_matrix(texts, remove_stopwords=not args.keep_stopwords)
+        counts, groups = drop_empty(counts, groups)
+        table = all_mdws(counts, vocab, groups, args.alpha, args.test)
+        table.to_csv(args.outfile, index=False, float_format="%.15g")
+    elif args.command == "stepwise":
+        counts, vocab = document_term_matrix(texts, remove_stopwords=args.remove_stopwords)
+        counts, groups = drop_empty(counts, groups)
+        features, names = feature_table(counts, vocab, args.n)
+        steps = stepwise_lda(features, groups, names, args.p_enter)
+        steps.to_csv(args.outfile, index=False)
+        print(steps)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Named-entity extraction for DSCM 2, one parse per chapter.
+
+The DSCM 2 notebook runs spaCy over every chapter once for each entity label
+it wants (people, places, organizations, ...). That parses each chapter four
+times with the whole pipeline, including the dependency parser. This module
+parses each chapter once. Only the components NER needs are enabled, the
+chapters are streamed through ``nlp.pipe``, and all the label files
+(``_ner_per.txt``, ``_ner_loc.txt``, ...) are written from that one parse.
+As in the notebook, only the chapters whose names end in the model's
+language (``fr.txt`` or ``en.txt``) are tagged, unless ``--ending`` says otherwise.
+
+    python -m dsc.ner /Users/qad/Documents/dsc/dscm2 --model fr_core_news_sm
+    python -m dsc.ner /Users/qad/Documents/dsc/dscm2/en --model en_core_web_sm --n-process 4
+"""
+
+import argparse
+import os
+
+import spacy
+
+
+# spaCy label -> output filename suffix. The English and French models use
+# different label sets, so "places" is LOC in French but GPE in English.
+FRENCH_LABELS = {"PER": "_ner_per", "LOC": "_ner_loc", "ORG": "_ner_org", "MISC": "_ner_misc"}
+ENGLISH_LABELS = {"PERSON": "_ner_per", "GPE": "_ner_loc", "ORG": "_ner_org", "WORK_OF_ART": "_ner_art"}
+LABELS_BY_LANG = {"fr": FRENCH_LABELS, "en": ENGLISH_LABELS}
+
+# The only components entity recognition needs in the stock models; everything
+# else is switched off
+NER_PIPES = ("tok2vec", "ner")
+# Components that never decide which entities are found, for models (like a
+# custom food model) that may also need a transformer, an entity_ruler...
+UNUSED_PIPES = ("parser", "tagger", "lemmatizer", "attribute_ruler")
+
+
+def load_ner_model(name, keep=NER_PIPES):
+    """Load a spaCy model with only the components in keep enabled.
+
+    With keep=None, every component is kept except the UNUSED_PIPES.
+    """
+    nlp = spacy.load(name)
+    if keep is None:
+        nlp.select_pipes(disable=[pipe for pipe in nlp.pipe_names if pipe in UNUSED_PIPES])
+    else:
+        nlp.select_pipes(enable=[pipe for pipe in nlp.pipe_names if pipe in keep])
+    return nlp
+
+
+def extract_entities(texts, nlp, labels, batch_size=16, n_process=1):
+    """Parse each text once and yield {label: [entity text, ...]} for it."""
+    for doc in nlp.pipe(texts, batch_size=batch_size, n_process=n_process):
+        found = {label: [] for label in labels}
+        for ent in doc.ents:
+            if ent.label_ in found:
+                found[ent.label_].append(ent.text)
+        yield found
+
+
+def _read(path):
+    with open(path, "r", encoding="utf8") as f:
+        return f.read()
+
+
+def write_ner_files(directory, nlp, labels=None, outdir=None, batch_size=16, n_process=1, ending=None):
+    """Write <chapter><suffix>.txt files, one entity per line, for every label.
+
+    labels maps spaCy labels to filename suffixes; by default it's picked from
+    the model's language. Only files whose names end with ending are tagged;
+    like DSCM 2, that defaults to the model's language ("fr.txt", "en.txt").
+    Returns the chapter filenames processed.
+    """
+    if labels is None:
+        labels = LABELS_BY_LANG[nlp.lang]
+    if ending is None:
+        ending = nlp.lang + ".txt"
+    outdir = directory if outdir is None else outdir
+    os.makedirs(outdir, exist_ok=True)
+    suffixes = tuple(suffix + ".txt" for suffix in labels.values())
+    # Skip our own output files, in case they're in the same directory
+    filenames = sorted(f for f in os.listdir(directory)
+                       if f.endswith(ending) and not f.endswith(suffixes))
+    # A generator, so only a batch of chapters is in memory at a time
+    texts = (_read(os.path.join(directory, f)) for f in filenames)
+    for filename, found in zip(filenames, extract_entities(texts, nlp, labels, batch_size, n_process)):
+        print(filename)
+        for label, suffix in labels.items():
+            outfilename = filename.replace(".txt", suffix + ".txt")
+            with open(os.path.join(outdir, outfilename), "w", encoding="utf8") as out:
+                for entity in found[label]:
+                    out.write(entity)
+                    out.write("\n")
+    return filenames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write per-label named-entity files for every chapter.")
+    parser.add_argument("directory", help="directory of chapter .txt files")
+    parser.add_argument("--model", default="fr_core_news_sm", help="spaCy model name or path")
+    parser.add_argument("--outdir", help="where to write the output files (default: directory)")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--n-process", type=int, default=1)
+    parser.add_argument("--ending", help="only tag files whose names end with this (default: <model language>.txt)")
+    args = parser.parse_args()
+    nlp = load_ner_model(args.model)
+    write_ner_files(args.directory, nlp, outdir=args.outdir,
+                    batch_size=args.batch_size, n_process=args.n_process, ending=args.ending)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Text clean-up in one pass, with named profiles for the notebooks' clean-up steps.
+
+Several notebooks clean texts with a chain of ``text.replace(...)`` calls
+(DSC 8's script prep has ten of them), and each call copies the whole book.
+A profile here puts every character deletion and replacement into a single
+``str.translate`` table. At most one regular expression runs after it, for
+the clean-ups that need one (like dsc20's dialogue removal). Profiles:
+
+- ``script``: DSC 8's prep for the fandom-search "script" files
+- ``quotes``: DSCM 2's curly-to-straight quotes
+- ``words``: DSC 19's word-finder clean-up (lower-case, no newlines or quotes)
+- ``csv``: DSCM 4's clean-up of aligned lines before writing them to CSV
+- ``no-dialogue``: dsc20's clean_quotes (straight quotes, then remove dialogue)
+
+    from dsc.normalize import normalize
+    text = normalize(text, "script")
+
+    python -m dsc.normalize script dsc_corpus_clean dsc_corpus_script
+
+Files are streamed a block of lines at a time, so they never need to fit in
+memory.
+"""
+
+import argparse
+import os
+import re
+
+
+class Normalizer:
+    """One compiled clean-up: optional lower-casing, a translate table, and optionally one regex.
+
+    delete is a string of characters to remove, replace a dict of
+    {character: replacement string}, and pattern/repl a regex substitution to
+    run last.
+    """
+
+    def __init__(self, delete="", replace=None, pattern=None, repl="", lower=False):
+        table = {ord(c): None for c in delete}
+        table.update({ord(c): r for c, r in (replace or {}).items()})
+        self.table = table
+        self.pattern = re.compile(pattern) if pattern is not None else None
+        self.repl = repl
+        self.lower = lower
+
+    def __call__(self, text):
+        if self.lower:
+            text = text.lower()
+        text = text.translate(self.table)
+        if self.pattern is not None:
+            text = self.pattern.sub(self.repl, text)
+        return text
+
+    def stream(self, infile, outfile, block_size=1 << 20):
+        """Normalize infile into outfile, reading about block_size characters at a time.
+
+        Blocks end at a line break, so the output is the same as normalizing
+        the whole file at once as long as the profile's regex can't match
+        across a line break. None of the PROFILES can, so their output doesn't
+        depend on block_size.
+        """
+        with open(infile, encoding="utf8") as f, open(outfile, "w", encoding="utf8") as out:
+            leftover = ""
+            while True:
+                block = f.read(block_size)
+                if not block:
+                    break
+                block = leftover + block
+                cut = block.rfind("\n") + 1
+                if cut == 0:
+                    leftover = block
+                    continue
+                leftover = block[cut:]
+                out.write(self(block[:cut]))
+            if leftover:
+                out.write(self(leftover))
+
+
+PROFILES = {
+    # DSC 8: delete , “ ” ( ) - and turn ’ into ' and — … and newlines into spaces
+    "script": Normalizer(delete=",“”()-", replace={"’": "'", "—": " ", "…": " ", "\n": " "}),
+    # DSCM 2: straighten curly quotes
+    "quotes": Normalizer(replace={"“": '"', "”": '"', "’": "'"}),
+    # DSC 19: lower-case, newlines to spaces, no double or single quotes
+    "words": Normalizer(delete="\"'", replace={"\n": " "}, lower=True),
+    # DSCM 4: no commas or double quotes in the CSV fields
+    "csv": Normalizer(delete=",\""),
+    # dsc20's clean_quotes: straighten quotes, then remove dialogue. It runs
+    # line by line, so a quote never runs on past a newline ([^\S\n] is \s without it)
+    "no-dialogue": Normalizer(replace={"’": "'", "‘": "'", "“": '"', "”": '"'},
+                              pattern=r'"\w(?:[\w.,\'!?…:\-—]|[^\S\n])*"'),
+}
+
+
+def normalize(text, profile):
+    """Clean text with the named profile (see PROFILES)."""
+    return PROFILES[profile](text)
+
+
+def normalize_files(profile, source, destination, block_size=1 << 20):
+    """Normalize a file, or every .txt file in a directory, streaming each one."""
+    normalizer = PROFILES[profile]
+    if not os.path.isdir(source):
+        normalizer.stream(source, destination, block_size)
+        return 1
+    os.makedirs(destination, exist_ok=True)
+    filenames = sorted(f for f in os.listdir(source) if f.endswith(".txt"))
+    for filename in filenames:
+        normalizer.stream(os.path.join(source, filename), os.path.join(destination, filename), block_size)
+    return len(filenames)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Clean up text files with a named profile.")
+    parser.add_argument("profile", choices=sorted(PROFILES))
+    parser.add_argument("source", help="a text file, or a directory of .txt files")
+    parser.add_argument("destination", help="output file, or output directory")
+    args = parser.parse_args()
+    count = normalize_files(args.profile, args.source, args.destination)
+    print("Normalized {} files".format(count))
+
+
+if __name__ == "__main__":
+    main()
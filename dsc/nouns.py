@@ -0,0 +1,95 @@
+"""Write the nouns (or other parts of speech) of each book to its own file.
+
+This is the noun extractor from DSC 10: for every book.txt, write book-nouns.txt
+containing each NN/NNS word followed by a space. The notebook tags one book at
+a time on one core. Here the books can be spread over a process pool instead.
+Each worker loads the perceptron tagger once and tags a whole book's sentences
+in one batch. The output files are the same whether you use 1 worker or 32.
+
+    python -m dsc.nouns /Users/qad/Documents/dsc_corpus_clean --workers 32
+"""
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import nltk
+
+from dsc.tokens import load_tagged, tag_sentences
+
+
+NOUN_TAGS = ("NN", "NNS")
+# You can sub in other parts of speech, too
+ADVERB_TAGS = ("RB", "RBR", "RBS")
+ADJECTIVE_TAGS = ("JJ", "JJR", "JJS")
+VERB_TAGS = ("VB", "VBD", "VBG", "VBN", "VBP", "VBZ")
+
+# Each worker process keeps its own tagger, loaded once by _load_tagger
+_tagger = None
+
+
+def _load_tagger():
+    global _tagger
+    _tagger = nltk.PerceptronTagger()
+
+
+def extract_words(text, tags=NOUN_TAGS, tagger=None, cache_dir=None):
+    """Return the words in text whose POS tag is in tags, in text order.
+
+    With cache_dir, tagging results are read from (and saved to) the
+    dsc.tokens cache.
+    """
+    if cache_dir is not None:
+        return load_tagged(text, cache_dir, tagger).words_with_tags(tags)
+    return [word for sentence in tag_sentences(text, tagger)
+            for word, pos in sentence if pos in tags]
+
+
+def _extract_file(job):
+    path, outpath, tags, cache_dir = job
+    with open(path, "r", encoding="utf8") as f:
+        text = f.read()
+    words = extract_words(text, tags, _tagger, cache_dir)
+    with open(outpath, "w", encoding="utf8") as out:
+        # A space after every word, same as the notebook
+        out.write("".join(word + " " for word in words))
+    return os.path.basename(path)
+
+
+def write_word_files(textdir, outdir=None, tags=NOUN_TAGS, suffix="-nouns", workers=1, cache_dir=None):
+    """Write <name><suffix>.txt for every .txt file in textdir.
+
+    Output goes next to the input files unless outdir is given. Files that
+    already end in the suffix are skipped, so reruns don't tag their own
+    output. Returns the names of the files processed.
+    """
+    outdir = textdir if outdir is None else outdir
+    os.makedirs(outdir, exist_ok=True)
+    filenames = [f for f in os.listdir(textdir)
+                 if f.endswith(".txt") and not f.endswith(suffix + ".txt")]
+    # Start the biggest books first so no worker is left with a long one at the end
+    filenames.sort(key=lambda f: os.path.getsize(os.path.join(textdir, f)), reverse=True)
+    jobs = [(os.path.join(textdir, f),
+             os.path.join(outdir, f.replace(".txt", suffix + ".txt")),
+             tuple(tags), cache_dir)
+            for f in filenames]
+    if workers == 1:
+        _load_tagger()
+        return [_extract_file(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_load_tagger) as executor:
+        return list(executor.map(_extract_file, jobs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the nouns of every text file to a -nouns.txt file.")
+    parser.add_argument("textdir", help="directory of .txt files")
+    parser.add_argument("--outdir", help="where to write the output files (default: textdir)")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    parser.add_argument("--cache-dir", help="dsc.tokens cache directory to read/write tags")
+    args = parser.parse_args()
+    done = write_word_files(args.textdir, args.outdir, workers=args.workers, cache_dir=args.cache_dir)
+    print("Wrote nouns for {} files".format(len(done)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""An index of every quotation in the corpus, with simple speaker attribution.
+
+DSC 15 pulls quotes out with ``re.findall(r'“(.*?)”', text)``, and only
+the last book's quotes survive its loop. To get Dawn's dialogue, it reads
+every book again and keeps paragraphs containing "said Dawn" or "Dawn said".
+Doing that for another character means another full pass. This module
+makes one pass over a packed corpus (see dsc.corpus) and records every
+quotation's book, byte offsets and paragraph (line) number. It also records
+which club members a "said X" / "X said" tag in the same paragraph attributes
+it to. The columns are saved as NumPy arrays in one .npz file, so sampling
+a character's quotes is an array lookup:
+
+    python -m dsc.quotes build dsc_corpus_packed bsc_quotes.npz
+    python -m dsc.quotes sample dsc_corpus_packed bsc_quotes.npz dawn.csv --speaker Dawn -k 300 --seed 15
+    python -m dsc.quotes sample dsc_corpus_packed bsc_quotes.npz nonilana.csv -k 300
+
+    from dsc.quotes import QuoteIndex
+    quotes = QuoteIndex.load('bsc_quotes.npz', 'dsc_corpus_packed')
+    randomdawns = quotes.sample('Dawn', 300, seed=15)
+"""
+
+import argparse
+import random
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+MEMBERS = ("Kristy", "Claudia", "Mary Anne", "Stacey", "Dawn",
+           "Mallory", "Jessi", "Abby", "Shannon", "Logan")
+
+# Matched on the UTF-8 bytes, so books never need decoding. Like
+# re.findall(r'“(.*?)”', text), quotes don't run across line breaks.
+QUOTE = re.compile("“(.*?)”".encode("utf8"))
+_names = "|".join(re.escape(name) for name in MEMBERS)
+SAID = re.compile(r"\bsaid ({0})\b|\b({0}) said\b".format(_names).encode("utf8"))
+_bits = {name.encode("utf8"): np.uint16(1 << i) for i, name in enumerate(MEMBERS)}
+
+
+def index_book(raw):
+    """Return (start, end, paragraph, speakers) arrays for the quotes in one book's UTF-8 bytes.
+
+    start/end are byte offsets of the text inside the quotation marks, and
+    paragraph is the 0-based line number. speakers is a bitmask over MEMBERS
+    of everyone tagged with "said X" / "X said" in that paragraph.
+    """
+    raw = bytes(raw)
+    newlines = np.flatnonzero(np.frombuffer(raw, dtype=np.uint8) == ord("\n"))
+    spans = np.array([m.span(1) for m in QUOTE.finditer(raw)], dtype=np.int64).reshape(-1, 2)
+    paragraphs = np.searchsorted(newlines, spans[:, 0])
+    # Every paragraph's speaker tags, ORed together
+    tags = [(m.start(), _bits[m.group(1) or m.group(2)]) for m in SAID.finditer(raw)]
+    paragraph_speakers = np.zeros(len(newlines) + 1, dtype=np.uint16)
+    if tags:
+        tag_starts, tag_bits = zip(*tags)
+        np.bitwise_or.at(paragraph_speakers, np.searchsorted(newlines, tag_starts),
+                         np.array(tag_bits, dtype=np.uint16))
+    return spans[:, 0], spans[:, 1], paragraphs.astype(np.int32), paragraph_speakers[paragraphs]
+
+
+# Each worker opens the packed corpus once
+_corpus = None
+
+
+def _open_corpus(pack_dir):
+    global _corpus
+    from dsc.corpus import Corpus
+    _corpus = Corpus(pack_dir)
+
+
+def _index_file(filename):
+    return index_book(_corpus.raw(filename))
+
+
+class QuoteIndex:
+    """Columns for every quote: book id, start, end, paragraph and speakers bitmask."""
+
+    def __init__(self, books, book, start, end, paragraph, speakers, corpus=None):
+        self.books = list(books)
+        self.book = np.asarray(book, dtype=np.int32)
+        self.start = np.asarray(start, dtype=np.int64)
+        self.end = np.asarray(end, dtype=np.int64)
+        self.paragraph = np.asarray(paragraph, dtype=np.int32)
+        self.speakers = np.asarray(speakers, dtype=np.uint16)
+        self.corpus = corpus
+
+    @classmethod
+    def build(cls, pack_dir, workers=1):
+        """Index every book in a packed corpus."""
+        from dsc.corpus import Corpus, read_index
+
+        books = [record.filename for record in read_index(pack_dir)]
+        if workers == 1:
+            _open_corpus(pack_dir)
+            results = list(map(_index_file, books))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_open_corpus,
+                                     initargs=(pack_dir,)) as executor:
+                results = list(executor.map(_index_file, books))
+        book = np.repeat(np.arange(len(books), dtype=np.int32), [len(r[0]) for r in results])
+        columns = [np.concatenate([r[i] for r in results]) if results else [] for i in range(4)]
+        return cls(books, book, *columns, corpus=Corpus(pack_dir))
+
+    def save(self, path):
+        np.savez(path, books=np.array(self.books, dtype=str), book=self.book, start=self.start,
+                 end=self.end, paragraph=self.paragraph, speakers=self.speakers,
+                 members=np.array(MEMBERS, dtype=str))
+
+    @classmethod
+    def load(cls, path, pack_dir=None):
+        """Load a saved index; pass pack_dir to be able to read the quote texts."""
+        from dsc.corpus import Corpus
+
+        with np.load(path) as data:
+            if tuple(data["members"]) != MEMBERS:
+                raise ValueError("{} was built with a different list of club members".format(path))
+            index = cls(data["books"], data["book"], data["start"], data["end"],
+                        data["paragraph"], data["speakers"])
+        if pack_dir is not None:
+            index.corpus = Corpus(pack_dir)
+        return index
+
+    def __len__(self):
+        return len(self.book)
+
+    def select(self, speaker=None):
+        """Row numbers of the quotes attributed to speaker (every quote if speaker is None)."""
+        if speaker is None:
+            return np.arange(len(self))
+        bit = np.uint16(1 << MEMBERS.index(speaker))
+        return np.flatnonzero(self.speakers & bit)
+
+    def text(self, row):
+        """The text of one quote, read from the packed corpus."""
+        raw = self.corpus.raw(self.books[self.book[row]])
+        return str(raw[self.start[row]:self.end[row]], "utf8")
+
+    def sample(self, speaker=None, k=300, seed=None):
+        """Return k random quotes from speaker (or from all quotes), like random.sample."""
+        rows = random.Random(seed).sample(list(self.select(speaker)), k)
+        return [self.text(row) for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index and sample the quotations in a packed corpus.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="index every quote in a packed corpus")
+    build.add_argument("pack_dir", help="packed corpus directory (see dsc.corpus)")
+    build.add_argument("index", help=".npz file to write")
+    build.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    sample = subparsers.add_parser("sample", help="write a random sample of quotes, one per line")
+    sample.add_argument("pack_dir", help="packed corpus directory the index was built from")
+    sample.add_argument("index", help=".npz file written by build")
+    sample.add_argument("outfile", help="file to write the quotes to")
+    sample.add_argument("--speaker", choices=MEMBERS, help="only quotes attributed to this club member")
+    sample.add_argument("-k", type=int, default=300, help="number of quotes")
+    sample.add_argument("--seed", type=int, help="random seed, for a repeatable sample")
+    args = parser.parse_args()
+    if args.command == "build":
+        index = QuoteIndex.build(args.pack_dir, args.workers)
+        index.save(args.index)
+        print("Indexed {} quotes".format(len(index)))
+    elif args.command == "sample":
+        index = QuoteIndex.load(args.index, args.pack_dir)
+        with open(args.outfile, "w", encoding="utf8") as out:
+            for quote in index.sample(args.speaker, args.k, args.seed):
+                out.write(quote + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""Random GPT-2-sized samples of real chapters, without keeping every token list in memory.
+
+DSC 9 runs ``word_tokenize`` over every chapter 2, keeps each chapter's full
+token list in the ``ch2examples`` dicts, and then draws 50 random 1,024-token
+windows. It picks the chapter with ``random.randint(0, len(ch2examples))``,
+which can run one past the end of the list. This module tokenizes each chapter
+once with a regular expression and keeps only where each token starts and ends
+(an int32 array per chapter, cached in one .npz file). A sample is then a
+slice of the original text, from the start of its first token to the end of its
+last. Samples are drawn with a seed, so they can be drawn again. Every possible
+window of every chapter is equally likely, so longer chapters get
+proportionally more samples. The count is split across series (or books) in
+proportion to their size. Samples are written chapter by chapter, and each
+chapter is read once:
+
+    python -m dsc.samples /Users/qad/Documents/dsc_chapters/ch2 ch2samples -k 50 --seed 9
+    python -m dsc.samples /Users/qad/Documents/dsc_chapters/ch2 ch2samples -k 50 --seed 9 --cache ch2_offsets.npz --stratify book
+
+Sample files are named like the notebook's, ``sample_<chapter>_<start token>.txt``.
+"""
+
+import argparse
+import os
+import re
+import tempfile
+
+import numpy as np
+
+from dsc.corpus import parse_filename
+
+
+WINDOW = 1024
+
+# Close to word_tokenize: words (with any apostrophes inside them) and single punctuation marks
+TOKEN = re.compile(r"\w+(?:['’]\w+)*|[^\w\s]")
+
+
+def token_bounds(text):
+    """(start, end) character offsets of every token in text, as an int32 array of shape (n, 2)."""
+    spans = [match.span() for match in TOKEN.finditer(text)]
+    return np.array(spans, dtype=np.int32).reshape(-1, 2)
+
+
+class TokenOffsets:
+    """Token offsets for every chapter in a directory, concatenated (CSR style, like dsc.hypernyms)."""
+
+    def __init__(self, filenames, sizes, indptr, bounds):
+        self.filenames = list(filenames)
+        # Each file's size when it was tokenized, to notice when the cache is stale
+        self.sizes = np.asarray(sizes, dtype=np.int64)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.bounds = np.asarray(bounds, dtype=np.int32).reshape(-1, 2)
+
+    @classmethod
+    def build(cls, directory):
+        """Tokenize every .txt file in directory."""
+        filenames = sorted(f for f in os.listdir(directory) if f.endswith(".txt"))
+        sizes = [os.path.getsize(os.path.join(directory, f)) for f in filenames]
+        bounds = []
+        for filename in filenames:
+            with open(os.path.join(directory, filename), encoding="utf8") as f:
+                bounds.append(token_bounds(f.read()))
+        indptr = np.zeros(len(filenames) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in bounds], out=indptr[1:])
+        all_bounds = np.concatenate(bounds) if bounds else np.zeros((0, 2), dtype=np.int32)
+        return cls(filenames, sizes, indptr, all_bounds)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["filenames"].tolist(), data["sizes"], data["indptr"], data["bounds"])
+
+    def save(self, path):
+        # Write to a temporary file first, as dsc.tokens does, so a crash never
+        # leaves a half-written cache
+        directory = os.path.dirname(path) or "."
+        fd, tmp_path = tempfile.mkstemp(suffix=".npz", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, filenames=np.array(self.filenames, dtype=str), sizes=self.sizes,
+                         indptr=self.indptr, bounds=self.bounds)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def matches(self, directory):
+        """True if directory still has exactly the files (and file sizes) these offsets were built from."""
+        filenames = sorted(f for f in os.listdir(directory) if f.endswith(".txt"))
+        if filenames != self.filenames:
+            return False
+        sizes = [os.path.getsize(os.path.join(directory, f)) for f in filenames]
+        return np.array_equal(sizes, self.sizes)
+
+    def lengths(self):
+        """Number of tokens in each chapter."""
+        return np.diff(self.indptr)
+
+    def chapter_bounds(self, i):
+        return self.bounds[self.indptr[i]:self.indptr[i + 1]]
+
+
+def load_offsets(directory, cache=None):
+    """Token offsets for directory, from the cache file if it is still up to date."""
+    if cache is not None and os.path.exists(cache):
+        offsets = TokenOffsets.load(cache)
+        if offsets.matches(directory):
+            return offsets
+    offsets = TokenOffsets.build(directory)
+    if cache is not None:
+        offsets.save(cache)
+    return offsets
+
+
+def _stratum(filename, stratify):
+    if stratify is None:
+        return None
+    series, book, _ = parse_filename(filename)
+    return series if stratify == "series" else (series, book)
+
+
+def _allocate(k, sizes):
+    # Split k across strata in proportion to sizes (largest remainder),
+    # never giving a stratum more than it has
+    quotas = k * sizes / sizes.sum()
+    counts = np.minimum(np.floor(quotas).astype(np.int64), sizes)
+    for i in np.argsort(-(quotas - counts), kind="stable"):
+        if counts.sum() == k:
+            break
+        if counts[i] < sizes[i]:
+            counts[i] += 1
+    # Anything still missing goes wherever there's room
+    while counts.sum() < k:
+        spare = np.flatnonzero(counts < sizes)
+        counts[spare[0]] += min(k - counts.sum(), sizes[spare[0]] - counts[spare[0]])
+    return counts
+
+
+def sample_windows(offsets, k=50, window=WINDOW, seed=None, stratify="series"):
+    """Choose k distinct windows of window tokens; returns (chapter index, start token) pairs.
+
+    Each window of each chapter is equally likely within its stratum, so
+    chapters are weighted by length. stratify is "series", "book" or None.
+    Chapters shorter than window are never sampled.
+    """
+    rng = np.random.default_rng(seed)
+    # Number of possible start tokens in each chapter
+    windows = np.maximum(offsets.lengths() - window + 1, 0)
+    if k > windows.sum():
+        raise ValueError("Only {} windows of {} tokens to choose from".format(windows.sum(), window))
+    strata = [_stratum(f, stratify) for f in offsets.filenames]
+    keys = list(dict.fromkeys(strata))
+    members = [np.flatnonzero([s == key for s in strata]) for key in keys]
+    counts = _allocate(k, np.array([windows[m].sum() for m in members], dtype=np.int64))
+    chosen = []
+    for chapters, count in zip(members, counts):
+        if count == 0:
+            continue
+        ends = np.cumsum(windows[chapters])
+        picks = rng.choice(ends[-1], size=count, replace=False)
+        which = np.searchsorted(ends, picks, side="right")
+        starts = picks - (ends[which] - windows[chapters][which])
+        chosen.extend(zip(chapters[which].tolist(), starts.tolist()))
+    return sorted(chosen)
+
+
+def sample_name(filename, start):
+    """The notebook's sample filename."""
+    return 'sample_' + filename.replace('.txt', '_') + str(start) + '.txt'
+
+
+def write_samples(directory, offsets, windows, outdir, window=WINDOW):
+    """Write each (chapter index, start) window to outdir, reading each chapter once.
+
+    Returns the sample filenames.
+    """
+    os.makedirs(outdir, exist_ok=True)
+    names = []
+    current, text = None, None
+    for chapter, start in sorted(windows):
+        filename = offsets.filenames[chapter]
+        if chapter != current:
+            with open(os.path.join(directory, filename), encoding="utf8") as f:
+                text = f.read()
+            current = chapter
+        bounds = offsets.chapter_bounds(chapter)
+        name = sample_name(filename, start)
+        with open(os.path.join(outdir, name), "w", encoding="utf8") as samplefile:
+            samplefile.write(text[bounds[start, 0]:bounds[start + window - 1, 1]])
+        names.append(name)
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write random GPT-2-sized samples of chapter files.")
+    parser.add_argument("directory", help="directory of chapter .txt files (e.g. dsc_chapters/ch2)")
+    parser.add_argument("outdir", help="directory to write the samples to")
+    parser.add_argument("-k", type=int, default=50, help="number of samples")
+    parser.add_argument("--window", type=int, default=WINDOW, help="tokens per sample")
+    parser.add_argument("--seed", type=int, help="random seed, for a repeatable sample")
+    parser.add_argument("--stratify", choices=("series", "book", "none"), default="series",
+                        help="split the samples across series or books in proportion to their length")
+    parser.add_argument("--cache", help=".npz file to keep the token offsets in between runs")
+    args = parser.parse_args()
+    offsets = load_offsets(args.directory, args.cache)
+    stratify = None if args.stratify == "none" else args.stratify
+    windows = sample_windows(offsets, args.k, args.window, args.seed, stratify)
+    for name in write_samples(args.directory, offsets, windows, args.outdir, args.window):
+        print(name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""VADER and TextBlob sentiment, scored once per sentence.
+
+DSC 11 fills its sentiment tables by calling ``vaderanalyzer.polarity_scores``
+four times per sentence (once each for compound, neg, neu and pos), plus a
+TextBlob pass. ``add_sentiment_columns`` scores each sentence once and fills
+all five columns from that one result:
+
+    from dsc.sentiment import add_sentiment_columns
+    sentencesdf = add_sentiment_columns(pd.DataFrame(sentences, columns=['sentence']))
+
+The same scoring can run over every sentence of every book in a packed corpus
+(see dsc.corpus). Books are spread over a process pool and the results are
+streamed into a Parquet file (or a TSV file, if the output name ends in .tsv):
+
+    python -m dsc.sentiment dsc_corpus_packed bsc_sentence_sentiment.parquet --workers 8
+"""
+
+import argparse
+import csv
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from nltk import tokenize
+from textblob import TextBlob
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+
+# Same column names as the DSC 11 tables
+SCORE_COLUMNS = ["tbsentiment", "vadersentiment", "vader-neg", "vader-neu", "vader-pos"]
+CORPUS_COLUMNS = ["book", "sentence_number", "sentence"] + SCORE_COLUMNS
+
+_vaderanalyzer = None
+
+
+def _analyzer():
+    # Building the analyzer reads the VADER lexicon, so only do it once per process
+    global _vaderanalyzer
+    if _vaderanalyzer is None:
+        _vaderanalyzer = SentimentIntensityAnalyzer()
+    return _vaderanalyzer
+
+
+def score_sentence(sentence):
+    """Return (TextBlob polarity, VADER compound, neg, neu, pos) for one sentence."""
+    vader = _analyzer().polarity_scores(sentence)
+    return (TextBlob(sentence).sentiment[0],
+            vader["compound"], vader["neg"], vader["neu"], vader["pos"])
+
+
+def add_sentiment_columns(df, column="sentence"):
+    """Add the tbsentiment/vadersentiment/vader-neg/vader-neu/vader-pos columns to df."""
+    scores = pd.DataFrame([score_sentence(sentence) for sentence in df[column]],
+                          columns=SCORE_COLUMNS, index=df.index)
+    for name in SCORE_COLUMNS:
+        df[name] = scores[name]
+    return df
+
+
+def book_sentences(text):
+    """Split a book into sentences the way DSC 11 does (newlines become spaces)."""
+    return tokenize.sent_tokenize(text.replace("\n", " "))
+
+
+# Each worker opens the packed corpus once; the blob is memory-mapped, so
+# all the workers share the same pages
+_corpus = None
+
+
+def _open_corpus(pack_dir):
+    global _corpus
+    from dsc.corpus import Corpus
+    _corpus = Corpus(pack_dir)
+
+
+def _score_book(filename):
+    rows = []
+    for number, sentence in enumerate(book_sentences(_corpus.text(filename))):
+        rows.append((filename, number, sentence) + score_sentence(sentence))
+    return rows
+
+
+def _write_parquet(outfile, books):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([("book", pa.string()), ("sentence_number", pa.int32()), ("sentence", pa.string())]
+                       + [(name, pa.float64()) for name in SCORE_COLUMNS])
+    with pq.ParquetWriter(outfile, schema) as writer:
+        for rows in books:
+            columns = list(zip(*rows)) if rows else [[] for _ in CORPUS_COLUMNS]
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema))
+
+
+def _write_tsv(outfile, books):
+    with open(outfile, "w", encoding="utf8", newline="") as out:
+        writer = csv.writer(out, delimiter="\t", lineterminator="\n")
+        writer.writerow(CORPUS_COLUMNS)
+        for rows in books:
+            writer.writerows(rows)
+
+
+def _map_in_order(executor, fn, items, window):
+    # Like executor.map, but with at most window tasks submitted and not yet
+    # collected, so finished books don't pile up behind a slow one
+    pending = deque()
+    for item in items:
+        if len(pending) == window:
+            yield pending.popleft().result()
+        pending.append(executor.submit(fn, item))
+    while pending:
+        yield pending.popleft().result()
+
+
+def score_corpus(pack_dir, outfile, workers=1):
+    """Score every sentence of every book in a packed corpus and write a table.
+
+    One row per sentence, with the CORPUS_COLUMNS columns. Books are written
+    in corpus order, and only two books per worker are handed out ahead of
+    the one being written, so only a few books' rows are in memory at once.
+    """
+    from dsc.corpus import read_index
+
+    filenames = [record.filename for record in read_index(pack_dir)]
+    write = _write_tsv if outfile.endswith(".tsv") else _write_parquet
+    if workers == 1:
+        _open_corpus(pack_dir)
+        write(outfile, (_score_book(filename) for filename in filenames))
+        return len(filenames)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_open_corpus, initargs=(pack_dir,)) as executor:
+        write(outfile, _map_in_order(executor, _score_book, filenames, 2 * workers))
+    return len(filenames)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score every sentence in a packed corpus with VADER and TextBlob.")
+    parser.add_argument("pack_dir", help="packed corpus directory (see dsc.corpus)")
+    parser.add_argument("outfile", help="output .parquet (or .tsv) file")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    args = parser.parse_args()
+    count = score_corpus(args.pack_dir, args.outfile, args.workers)
+    print("Scored {} books".format(count))
+
+
+if __name__ == "__main__":
+    main()
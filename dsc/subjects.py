@@ -0,0 +1,116 @@
+"""Subject/verb pairs for whole books, parsed in bounded chunks.
+
+DSCM 5 hands a whole book to spaCy (``doc = frnlp(book)``) and pulls out the
+noun chunks whose root is an ``nsubj``. One Doc for a whole Super Special can
+hit spaCy's ``max_length`` and use gigabytes of memory. This module splits
+each book at paragraph boundaries (and at sentence boundaries inside very long
+paragraphs) into chunks of at most ``max_chars``. It streams the chunks through
+``nlp.pipe`` and writes each TSV row as soon as it's found. Peak memory
+depends on the chunk size, not the length of the book.
+
+    python -m dsc.subjects /Users/qad/Documents/dsc_fr_verbs dsc-french-verbs.tsv --model fr_core_news_sm
+"""
+
+import argparse
+import os
+import re
+
+import spacy
+
+
+MAX_CHARS = 20000
+
+# Chunks are cut just after a match of one of these: the end of a paragraph,
+# the end of a sentence (with any closing quote), or, as a last resort, a space
+PARAGRAPH_END = re.compile(r"\n+")
+SENTENCE_END = re.compile(r"[.!?…][”\"’']?(?=\s)")
+WORD_END = re.compile(r"\s+")
+
+
+def _cut_after(text, pattern):
+    # Split text just after every match of pattern, keeping all the characters
+    pieces = []
+    start = 0
+    for match in pattern.finditer(text):
+        if match.end() > start:
+            pieces.append(text[start:match.end()])
+            start = match.end()
+    if start < len(text):
+        pieces.append(text[start:])
+    return pieces
+
+
+def _pack(pieces, max_chars):
+    # Join consecutive pieces into chunks of at most max_chars (a single
+    # piece longer than that becomes a chunk on its own)
+    current = ""
+    for piece in pieces:
+        if current and len(current) + len(piece) > max_chars:
+            yield current
+            current = ""
+        current += piece
+    if current:
+        yield current
+
+
+def _pieces(text, max_chars, patterns=(PARAGRAPH_END, SENTENCE_END, WORD_END)):
+    # Cut at the coarsest boundary first, and only cut pieces that are still
+    # too long at the next, finer one
+    for piece in _cut_after(text, patterns[0]):
+        if len(piece) > max_chars and len(patterns) > 1:
+            yield from _pieces(piece, max_chars, patterns[1:])
+        else:
+            yield piece
+
+
+def split_into_chunks(text, max_chars=MAX_CHARS):
+    """Yield consecutive pieces of text, each at most max_chars long.
+
+    Chunks end at paragraph boundaries where possible, otherwise at sentence
+    boundaries. Only a single sentence longer than max_chars is cut at
+    whitespace. Joining the chunks gives back the original text.
+    """
+    return _pack(_pieces(text, max_chars), max_chars)
+
+
+def subject_verbs(doc):
+    """Yield (subject, verb) for every noun chunk whose root is a nominal subject."""
+    for chunk in doc.noun_chunks:
+        if chunk.root.dep_ == "nsubj":
+            yield chunk.text.replace(",", ""), chunk.root.head.text
+
+
+def _chunks_for(directory, filenames, max_chars):
+    for filename in filenames:
+        with open(os.path.join(directory, filename), "r", encoding="utf8") as bookfile:
+            book = bookfile.read()
+        for chunk in split_into_chunks(book, max_chars):
+            yield chunk, filename
+
+
+def write_subject_verbs(directory, outfile, nlp, max_chars=MAX_CHARS, batch_size=4, n_process=1):
+    """Write Filename/Subject/Verb rows for every .txt file in directory."""
+    filenames = sorted(f for f in os.listdir(directory) if f.endswith(".txt"))
+    chunks = _chunks_for(directory, filenames, max_chars)
+    with open(outfile, "w", encoding="utf8") as out:
+        out.write("Filename\tSubject\tVerb\n")
+        for doc, filename in nlp.pipe(chunks, as_tuples=True, batch_size=batch_size, n_process=n_process):
+            for subject, verb in subject_verbs(doc):
+                out.write(filename + "\t" + subject + "\t" + verb + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write subject/verb pairs for every book to a TSV file.")
+    parser.add_argument("directory", help="directory of book .txt files")
+    parser.add_argument("outfile", help="TSV file to write")
+    parser.add_argument("--model", default="fr_core_news_sm", help="spaCy model name or path")
+    parser.add_argument("--max-chars", type=int, default=MAX_CHARS, help="largest chunk to parse at once")
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--n-process", type=int, default=1)
+    args = parser.parse_args()
+    nlp = spacy.load(args.model)
+    write_subject_verbs(args.directory, args.outfile, nlp, args.max_chars, args.batch_size, args.n_process)
+
+
+if __name__ == "__main__":
+    main()
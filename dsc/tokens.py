@@ -0,0 +1,168 @@
+"""Sentence-split, tokenize and POS tag texts once, and keep the results.
+
+DSC 10 and DSCM 4 both run ``nltk.sent_tokenize`` -> ``nltk.word_tokenize`` ->
+``nltk.pos_tag`` over the whole corpus, and POS tagging is the slowest step.
+This module does that work once per text and caches it on disk, keyed by a
+hash of the text itself. Changing a book (or upgrading NLTK) gives it a new
+key, so stale results are never read back.
+
+Each cache entry is a small .npz file with columns instead of Python objects:
+token ids (int32) into a per-text vocabulary, tag ids (uint8) into a per-text
+tag list, and the token offset where each sentence starts.
+
+    python -m dsc.tokens dsc_corpus_packed dsc_token_cache
+
+    from dsc.tokens import load_tagged
+    tagged = load_tagged(text, 'dsc_token_cache')
+    for sentence in tagged.sentences():
+        for word, pos in sentence:
+            ...
+"""
+
+import argparse
+import hashlib
+import os
+import tempfile
+
+import nltk
+import numpy as np
+
+
+# Bump this if the way texts are tokenized changes, so old cache entries are ignored
+CACHE_VERSION = "1"
+
+
+def cache_key(text):
+    """Hash of the text plus the tokenizer setup, used as the cache filename."""
+    digest = hashlib.sha1()
+    digest.update("{}:{}\n".format(CACHE_VERSION, nltk.__version__).encode("utf8"))
+    digest.update(text.encode("utf8"))
+    return digest.hexdigest()
+
+
+def tag_sentences(text, tagger=None):
+    """Split text into sentences and POS tag each one.
+
+    This is the same sent_tokenize/word_tokenize/pos_tag sequence the notebooks
+    use. Passing an already-loaded PerceptronTagger avoids loading the model
+    again for every text. Returns a list of [(word, tag), ...] lists.
+    """
+    sentences = [nltk.word_tokenize(str(sentence)) for sentence in nltk.sent_tokenize(text)]
+    if tagger is None:
+        return nltk.pos_tag_sents(sentences)
+    return tagger.tag_sents(sentences)
+
+
+class TaggedText:
+    """Tokens and POS tags for one text, stored as NumPy columns."""
+
+    def __init__(self, vocab, tagset, token_ids, tag_ids, sentence_starts):
+        self.vocab = vocab
+        self.tagset = tagset
+        self.token_ids = token_ids
+        self.tag_ids = tag_ids
+        # One more entry than there are sentences: the last one is the token count
+        self.sentence_starts = sentence_starts
+
+    @classmethod
+    def from_sentences(cls, tagged_sentences):
+        vocab = {}
+        tagset = {}
+        token_ids = []
+        tag_ids = []
+        sentence_starts = [0]
+        for sentence in tagged_sentences:
+            for word, pos in sentence:
+                token_ids.append(vocab.setdefault(word, len(vocab)))
+                tag_ids.append(tagset.setdefault(pos, len(tagset)))
+            sentence_starts.append(len(token_ids))
+        if len(tagset) > 256:
+            raise ValueError("More than 256 distinct POS tags; tag ids are stored as uint8")
+        return cls(list(vocab), list(tagset),
+                   np.array(token_ids, dtype=np.int32),
+                   np.array(tag_ids, dtype=np.uint8),
+                   np.array(sentence_starts, dtype=np.int32))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["vocab"].tolist(), data["tagset"].tolist(),
+                       data["token_ids"], data["tag_ids"], data["sentence_starts"])
+
+    def save(self, path):
+        # Write to a temporary file first so a crash (or another process
+        # writing the same entry) never leaves a half-written cache file
+        directory = os.path.dirname(path) or "."
+        fd, tmp_path = tempfile.mkstemp(suffix=".npz", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f,
+                         vocab=np.array(self.vocab, dtype=str),
+                         tagset=np.array(self.tagset, dtype=str),
+                         token_ids=self.token_ids,
+                         tag_ids=self.tag_ids,
+                         sentence_starts=self.sentence_starts)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def __len__(self):
+        return len(self.token_ids)
+
+    def sentence_count(self):
+        return len(self.sentence_starts) - 1
+
+    def words(self):
+        return [self.vocab[i] for i in self.token_ids]
+
+    def tags(self):
+        return [self.tagset[i] for i in self.tag_ids]
+
+    def sentences(self):
+        """Yield each sentence as a list of (word, tag) pairs."""
+        words = self.words()
+        tags = self.tags()
+        for start, end in zip(self.sentence_starts[:-1], self.sentence_starts[1:]):
+            yield list(zip(words[start:end], tags[start:end]))
+
+    def words_with_tags(self, tags):
+        """Return the words whose tag is in tags, in text order, e.g. ('NN', 'NNS')."""
+        wanted = [i for i, tag in enumerate(self.tagset) if tag in tags]
+        mask = np.isin(self.tag_ids, wanted)
+        return [self.vocab[i] for i in self.token_ids[mask]]
+
+
+def load_tagged(text, cache_dir, tagger=None):
+    """Return the TaggedText for text, tagging it only if it isn't cached yet."""
+    path = os.path.join(cache_dir, cache_key(text) + ".npz")
+    if os.path.exists(path):
+        return TaggedText.load(path)
+    tagged = TaggedText.from_sentences(tag_sentences(text, tagger))
+    os.makedirs(cache_dir, exist_ok=True)
+    tagged.save(path)
+    return tagged
+
+
+def tag_corpus(corpus, cache_dir, tagger=None):
+    """Yield (filename, TaggedText) for every text in a dsc.corpus.Corpus."""
+    if tagger is None:
+        tagger = nltk.PerceptronTagger()
+    for filename, text in corpus.items():
+        yield filename, load_tagged(text, cache_dir, tagger)
+
+
+def main():
+    from dsc.corpus import Corpus
+
+    parser = argparse.ArgumentParser(description="Fill the POS tag cache for a packed corpus.")
+    parser.add_argument("pack_dir", help="packed corpus directory (see dsc.corpus)")
+    parser.add_argument("cache_dir", help="directory for the cached .npz files")
+    args = parser.parse_args()
+    with Corpus(args.pack_dir) as corpus:
+        for filename, tagged in tag_corpus(corpus, args.cache_dir):
+            print(filename + ' - ' + str(len(tagged)))
+
+
+if __name__ == "__main__":
+    main()
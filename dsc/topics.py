@@ -0,0 +1,133 @@
+"""Token-weighted topic proportions by book, narrator, chapter or any other key, for DSC 20.
+
+DSC 20 gets each book's (and narrator's, and chapter's) topic proportions by
+looping over the topics. For each one it calls ``groupby(...).apply(lambda
+gp: np.average(gp[str(i)], weights=gp['ntokens']))``, so every topic is
+another pass of Python calls per group. It also parses every segment name
+with a row-wise ``apply`` and maps narrators with ``iterrows``. Here every
+topic is averaged at once: multiply the topic columns by the token counts,
+``groupby().sum()``, and divide by the summed weights. Segment names are
+parsed with ``str.extract``, and the long one-row-per-segment-per-topic table
+comes from ``melt``:
+
+    python -m dsc.topics /Users/qad/Documents/dsc/dsc_topicmodels 20 --by book narrator chapter
+
+    from dsc.topics import load_doctopics, weighted_means, topic_observations
+    doctopics_df = load_doctopics(data_path, 20)
+    book_df = weighted_means(doctopics_df, 'book')
+    topic_obs_df = topic_observations(doctopics_df)
+
+writes ``<key>_topics_<ntopics>.csv`` for each key and ``topic_obs_<ntopics>.csv``.
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+
+DOCTOPICS_FILE = "dsc.doctopics.txt"
+DOCS_FILE = "dsc_chunks_by_chapter_and_narrator.tsv"
+STATE_FILE = "dsc1.txt.gz"
+OBS_COLUMNS = ["segment_name", "topic", "chapter", "book", "narrator", "proportion", "n_tokens"]
+
+
+def topic_columns(ntopics):
+    return [str(i) for i in range(ntopics)]
+
+
+def read_doctopics(path, ntopics):
+    """MALLET's doc-topics file: id, segment_name and one column per topic."""
+    return pd.read_csv(path, delimiter="\t", names=["id", "segment_name"] + topic_columns(ntopics))
+
+
+def add_segment_columns(doctopics_df):
+    """Add chapter and book columns parsed from segment names like 002c_claudia_..._5.txt-4."""
+    names = doctopics_df["segment_name"]
+    doctopics_df["chapter"] = names.str.extract(r"^.*_([0-9]+)\.txt-*", expand=False).astype(int)
+    doctopics_df["book"] = names.str.extract(r"^(.*)_[0-9]+\.txt-*", expand=False)
+    return doctopics_df
+
+
+def read_narrators(docs_file):
+    """{segment id: narrator} from the chunk TSV (see dsc.chunks)."""
+    docs_df = pd.read_csv(docs_file, delimiter="\t", quoting=3, names=["id", "narrator_chapter", "text"],
+                          usecols=["id", "narrator_chapter"])
+    narrators = pd.Series(docs_df["narrator_chapter"].str.split("_").str[0].to_numpy(), index=docs_df["id"])
+    # Like the notebook's dict, a repeated id keeps its last narrator
+    return narrators[~narrators.index.duplicated(keep="last")]
+
+
+def token_counts(state_file, ndocs):
+    """Tokens per document (after stopword removal) from the gzipped MALLET state file."""
+    docs = pd.read_csv(state_file, compression="gzip", delimiter=" ", skiprows=[1, 2], usecols=["#doc"])["#doc"]
+    return np.bincount(docs.to_numpy(), minlength=ndocs)[:ndocs]
+
+
+def load_doctopics(data_path, ntopics, docs_file=None, model_path=None):
+    """The notebook's doctopics_df: topics, chapter, book, narrator and ntokens for every segment.
+
+    model_path defaults to <data_path>/<ntopics>topics/, as in DSC 20.
+    """
+    model_path = model_path or os.path.join(data_path, "{}topics".format(ntopics))
+    doctopics_df = add_segment_columns(read_doctopics(os.path.join(model_path, DOCTOPICS_FILE), ntopics))
+    narrators = read_narrators(docs_file or os.path.join(data_path, DOCS_FILE))
+    doctopics_df["narrator"] = doctopics_df["segment_name"].map(narrators)
+    # Segments are numbered by row, like #doc in the state file
+    doctopics_df["ntokens"] = token_counts(os.path.join(model_path, STATE_FILE), len(doctopics_df))
+    return doctopics_df
+
+
+def _topics_in(doctopics_df):
+    # The topic columns are the ones named 0, 1, 2, ...
+    ntopics = 0
+    while str(ntopics) in doctopics_df.columns:
+        ntopics += 1
+    return topic_columns(ntopics)
+
+
+def weighted_means(doctopics_df, by, weights="ntokens", topics=None):
+    """Every topic's weighted mean proportion for each value of by (a column name or a list of them).
+
+    Same as np.average(gp[topic], weights=gp[weights]) per group and topic.
+    Groups whose weights sum to 0 get NaN.
+    """
+    topics = topics or _topics_in(doctopics_df)
+    keys = [by] if isinstance(by, str) else list(by)
+    weighted = doctopics_df[topics].mul(doctopics_df[weights], axis=0)
+    grouped = pd.concat([doctopics_df[keys], weighted, doctopics_df[[weights]]], axis=1).groupby(keys)
+    sums = grouped.sum()
+    return sums[topics].div(sums[weights].where(sums[weights] != 0), axis=0)
+
+
+def topic_observations(doctopics_df, topics=None):
+    """One row per segment per topic, in segment order: DSC 20's topic_obs_df."""
+    topics = topics or _topics_in(doctopics_df)
+    ids = ["segment_name", "chapter", "book", "narrator", "ntokens"]
+    long_df = doctopics_df.melt(id_vars=ids, value_vars=topics, var_name="topic",
+                                value_name="proportion", ignore_index=False)
+    # melt goes topic by topic; the notebook goes segment by segment
+    long_df = long_df.sort_index(kind="stable").reset_index(drop=True)
+    return long_df.rename(columns={"ntokens": "n_tokens"})[OBS_COLUMNS]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Token-weighted topic proportions for the DSC 20 topic models.")
+    parser.add_argument("data_path", help="directory with the chunk TSV and the <n>topics/ model directories")
+    parser.add_argument("ntopics", type=int, help="number of topics in the model (10, 20, 50...)")
+    parser.add_argument("--by", nargs="+", default=["book", "narrator", "chapter"],
+                        help="columns to group by, one output file each")
+    parser.add_argument("--docs", help="chunk TSV (default: <data_path>/" + DOCS_FILE + ")")
+    parser.add_argument("--outdir", default=".", help="where to write the CSV files")
+    args = parser.parse_args()
+    doctopics_df = load_doctopics(args.data_path, args.ntopics, args.docs)
+    for key in args.by:
+        outfile = os.path.join(args.outdir, "{}_topics_{}.csv".format(key, args.ntopics))
+        weighted_means(doctopics_df, key).to_csv(outfile)
+    topic_observations(doctopics_df).to_csv(os.path.join(args.outdir, "topic_obs_{}.csv".format(args.ntopics)),
+                                            index=False)
+
+
+if __name__ == "__main__":
+    main()
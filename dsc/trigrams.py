@@ -0,0 +1,202 @@
+"""Character n-gram features for the DSC 15 trigram analysis, sparse and in parallel.
+
+DSC 15 makes trigrams in R with ``makeCharacterTrigrams``. It swaps spaces
+for underscores, splits each quote into single characters, and pastes every
+run of three back together. The quotes then go through a ``tm`` DTM that is
+converted to a dense ``corpus.matrix.tg`` just to take ``colSums`` for the top
+75. This module counts character n-grams (any range of n, not just 3) with
+scikit-learn, one chunk of texts per worker process, and keeps the counts as a
+sparse matrix. With ``--hashing``, n-grams are hashed into a fixed number of
+columns, so no vocabulary has to be built or held in memory. The names are
+only looked up afterwards for the columns that turn out to matter. The top
+features go to ``dsc.typicality``'s randomized PCA, and the MDWs and stepwise
+LDA come from ``dsc.mdw``:
+
+    python -m dsc.trigrams pca ilana_quotes.csv ilana_trigram_pca.csv -n 75
+    python -m dsc.trigrams mdw ilana_quotes.csv TrigramMDWs.csv --hashing --workers 4
+    python -m dsc.trigrams stepwise ilana_quotes.csv ilana_trigram_stepwise.csv --ngram-range 2 4
+
+The input CSV has a Text column and a Group column, as for dsc.mdw.
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer
+from sklearn.utils import murmurhash3_32
+
+from dsc.mdw import all_mdws, read_quotes, stepwise_lda
+from dsc.typicality import pca_coordinates
+
+
+N_FEATURES = 2 ** 20
+
+
+def char_ngrams(text, ngram_range=(3, 3)):
+    """makeCharacterTrigrams for every n in ngram_range: lower-cased, spaces as underscores."""
+    text = text.lower().replace(" ", "_")
+    low, high = ngram_range
+    return [text[i:i + n] for n in range(low, high + 1) for i in range(len(text) - n + 1)]
+
+
+def drop_short(texts, groups, min_length=3):
+    """Drop the texts with fewer than min_length characters (and their groups), as DSC 15 does."""
+    keep = [i for i, text in enumerate(texts) if len(text) >= min_length]
+    return [texts[i] for i in keep], [groups[i] for i in keep]
+
+
+def _vectorizer(ngram_range, hashing, n_features):
+    analyzer = partial(char_ngrams, ngram_range=tuple(ngram_range))
+    if hashing:
+        # Raw counts, like the unhashed matrix
+        return HashingVectorizer(analyzer=analyzer, n_features=n_features, alternate_sign=False, norm=None)
+    return CountVectorizer(analyzer=analyzer)
+
+
+# Each worker builds its vectorizer once
+_settings = None
+
+
+def _set_vectorizer(ngram_range, hashing, n_features):
+    global _settings
+    _settings = (ngram_range, hashing, n_features)
+
+
+def _count_chunk(texts):
+    ngram_range, hashing, n_features = _settings
+    vectorizer = _vectorizer(ngram_range, hashing, n_features)
+    if hashing:
+        return vectorizer.transform(texts).tocsr(), None
+    return vectorizer.fit_transform(texts).tocsr(), vectorizer.get_feature_names_out()
+
+
+def _merge_vocabularies(results):
+    # Put every chunk's columns into the (sorted) union of the chunk vocabularies
+    vocab = np.unique(np.concatenate([chunk_vocab for _, chunk_vocab in results]))
+    blocks = []
+    for counts, chunk_vocab in results:
+        columns = np.searchsorted(vocab, chunk_vocab)
+        block = sparse.csr_matrix((counts.data, columns[counts.indices], counts.indptr),
+                                  shape=(counts.shape[0], len(vocab)))
+        block.sort_indices()
+        blocks.append(block)
+    return sparse.vstack(blocks, format="csr"), vocab
+
+
+def ngram_matrix(texts, ngram_range=(3, 3), hashing=False, n_features=N_FEATURES, workers=1, chunk_size=1000):
+    """Sparse counts of the character n-grams in each text.
+
+    Returns (counts, vocab). vocab is the sorted n-grams, or None with hashing,
+    where column j counts the n-grams that hash to j (see hashed_names).
+    """
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    settings = (tuple(ngram_range), hashing, n_features)
+    if workers == 1:
+        _set_vectorizer(*settings)
+        results = list(map(_count_chunk, chunks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_set_vectorizer, initargs=settings) as executor:
+            results = list(executor.map(_count_chunk, chunks))
+    if not results:
+        return sparse.csr_matrix((0, n_features if hashing else 0)), None if hashing else np.array([], dtype=str)
+    if hashing:
+        return sparse.vstack([counts for counts, _ in results], format="csr"), None
+    return _merge_vocabularies(results)
+
+
+def hashed_names(texts, columns, ngram_range=(3, 3), n_features=N_FEATURES):
+    """Names for hashed columns: the n-grams in texts that hash to each column.
+
+    If two n-grams collide in a column, the name has both, joined by "|".
+    """
+    wanted = {int(column): [] for column in columns}
+    seen = set()
+    for text in texts:
+        for gram in char_ngrams(text, ngram_range):
+            if gram in seen:
+                continue
+            seen.add(gram)
+            # The same bucket HashingVectorizer uses
+            column = abs(murmurhash3_32(gram, seed=0)) % n_features
+            if column in wanted:
+                wanted[column].append(gram)
+    return np.array(["|".join(sorted(wanted[int(column)])) for column in columns], dtype=object)
+
+
+def top_columns(counts, n=75):
+    """The n columns with the highest totals (ties in column order), in column order."""
+    sums = np.asarray(counts.sum(axis=0)).ravel()
+    return np.sort(np.argsort(-sums, kind="stable")[:n])
+
+
+def feature_table(counts, columns):
+    """Relative frequencies (scaled by each text's total n-gram count) of the chosen columns."""
+    row_sums = np.asarray(counts.sum(axis=1)).ravel().astype(float)
+    row_sums[row_sums == 0] = 1
+    return sparse.diags(1 / row_sums).dot(counts[:, columns]).toarray()
+
+
+def feature_names(names):
+    """Display names, as in DSC 15: underscores back to spaces and curly apostrophes straightened."""
+    return np.array([name.replace("_", " ").replace("’", "'") for name in names], dtype=object)
+
+
+def column_names(texts, vocab, columns, args):
+    if vocab is not None:
+        return vocab[columns]
+    return hashed_names(texts, columns, args.ngram_range, args.n_features)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Character n-gram PCA, MDWs and stepwise LDA for grouped texts.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    pca = subparsers.add_parser("pca", help="PCA coordinates from the most frequent n-grams")
+    pca.add_argument("--components", type=int, default=2, help="number of principal components")
+    pca.add_argument("--scale", action="store_true", help="scale each feature first, like prcomp(scale=T)")
+    mdw = subparsers.add_parser("mdw", help="the n-grams most distinctive of each group")
+    mdw.add_argument("--alpha", type=float, default=0.05, help="significance cut-off")
+    mdw.add_argument("--test", choices=("fisher", "chisq"), default="fisher")
+    step = subparsers.add_parser("stepwise", help="stepwise LDA over the most frequent n-grams")
+    step.add_argument("--p-enter", type=float, default=0.05, help="largest p-value of the F to enter")
+    for sub in (pca, mdw, step):
+        sub.add_argument("infile", help="CSV with a text column and a group column")
+        sub.add_argument("outfile", help="CSV file to write")
+        sub.add_argument("--text-column", default="Text")
+        sub.add_argument("--group-column", default="Group")
+        sub.add_argument("--ngram-range", type=int, nargs=2, default=(3, 3), metavar=("MIN", "MAX"))
+        sub.add_argument("-n", type=int, default=75, help="number of most frequent n-grams to use")
+        sub.add_argument("--hashing", action="store_true", help="hash n-grams instead of building a vocabulary")
+        sub.add_argument("--n-features", type=int, default=N_FEATURES, help="number of hashed columns")
+        sub.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    args = parser.parse_args()
+    texts, groups = read_quotes(args.infile, args.text_column, args.group_column)
+    texts, groups = drop_short(texts, groups, args.ngram_range[0])
+    counts, vocab = ngram_matrix(texts, args.ngram_range, args.hashing, args.n_features, args.workers)
+    if args.command == "mdw":
+        # Name only the significant columns
+        placeholder = np.arange(counts.shape[1])
+        table = all_mdws(counts, placeholder, groups, args.alpha, args.test)
+        table["Term"] = column_names(texts, vocab, table["Term"].to_numpy(dtype=np.int64), args)
+        table.to_csv(args.outfile, index=False, float_format="%.15g")
+        return
+    columns = top_columns(counts, args.n)
+    names = feature_names(column_names(texts, vocab, columns, args))
+    features = feature_table(counts, columns)
+    if args.command == "pca":
+        coords = pca_coordinates(features, args.components, args.scale)
+        table = pd.DataFrame(coords, columns=["PC{}".format(i + 1) for i in range(coords.shape[1])])
+        table["Group"] = groups
+        table["Text"] = texts
+        table.to_csv(args.outfile, index=False)
+    elif args.command == "stepwise":
+        steps = stepwise_lda(features, groups, names, args.p_enter)
+        steps.to_csv(args.outfile, index=False)
+        print(steps)
+
+
+if __name__ == "__main__":
+    main()
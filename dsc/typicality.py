@@ -0,0 +1,158 @@
+"""Corpus typicality: which books sit closest to the middle of the corpus?
+
+DSC 10 does this in R through rpy2. ``corpusTypicality`` cleans each text,
+builds a ``tm`` DocumentTermMatrix, keeps the most frequent words, runs
+``prcomp`` on their relative frequencies and writes the PCA coordinates. A
+Python ``pClosest`` then sorts hand-pasted coordinates to find the books
+nearest the centre. This module does the whole thing in Python. The DTM stays
+sparse until only the most frequent words are left. PCA can keep any number
+of components. The full ranking is one sort of the distances from the centre,
+and ``closest`` picks just the k most typical books with ``np.argpartition``.
+
+    python -m dsc.typicality /Users/qad/Documents/dsc_pca_all_words . dsc_pca_all_words
+    python -m dsc.typicality /Users/qad/Documents/dsc_nouns . dsc_nouns --scale -k 21
+
+writes ``top_terms_<corpus name>.csv`` and ``<corpus name>_pca.csv`` like the R
+function, plus ``<corpus name>_typicality.csv`` ranking every book by its
+distance from the centre.
+"""
+
+import argparse
+import csv
+import os
+import re
+
+import numpy as np
+import pandas as pd
+from sklearn.decomposition import PCA
+from sklearn.feature_extraction.text import CountVectorizer
+
+
+# Mark's cleanChunk: lower-case, and throw out anything that isn't a letter or a space
+NOT_A_LETTER = re.compile(r"[^a-z ]+")
+
+
+def clean_chunk(text):
+    """Python version of the R cleanChunk function."""
+    return NOT_A_LETTER.sub("", " ".join(text.splitlines()).lower())
+
+
+def top_terms(counts, vocab, top_words=1000, starts_with=1):
+    """Words ranked starts_with..top_words by total count (1-based, like the R code)."""
+    word_freqs = np.asarray(counts.sum(axis=0)).ravel()
+    # Stable, so ties keep alphabetical order like R's sort()
+    order = np.argsort(-word_freqs, kind="stable")
+    return vocab[order[starts_with - 1:top_words]]
+
+
+def mfw_matrix(texts, top_words=1000, starts_with=1, min_word_length=3):
+    """Relative frequencies of the most frequent words, as a dense documents x words array.
+
+    min_word_length=3 matches tm's DocumentTermMatrix default. Returns
+    (matrix, top terms); the matrix columns are in alphabetical order, like tm.
+    """
+    vectorizer = CountVectorizer(lowercase=False, token_pattern=r"[a-z]{%d,}" % min_word_length)
+    counts = vectorizer.fit_transform(clean_chunk(text) for text in texts)
+    vocab = vectorizer.get_feature_names_out()
+    terms = top_terms(counts, vocab, top_words, starts_with)
+    columns = np.flatnonzero(np.isin(vocab, terms))
+    row_sums = np.asarray(counts.sum(axis=1)).ravel().astype(float)
+    row_sums[row_sums == 0] = 1
+    # Divide by book length before dropping columns, like dtm.scale in the R code
+    mfw = counts[:, columns].toarray() / row_sums[:, None]
+    return mfw, terms
+
+
+def pca_coordinates(matrix, n_components=2, scale=False, random_state=0):
+    """PCA coordinates of each row, like prcomp (scale=True is prcomp(scale=T)).
+
+    Uses a randomized SVD, so it stays fast with many documents and words.
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    if scale:
+        sd = matrix.std(axis=0, ddof=1)
+        sd[sd == 0] = 1
+        matrix = (matrix - matrix.mean(axis=0)) / sd
+    pca = PCA(n_components=n_components, svd_solver="randomized", random_state=random_state)
+    return pca.fit_transform(matrix)
+
+
+def centre_distances(coords):
+    """Each row's distance from the centre. PCA coordinates are centred, so the centre is the origin."""
+    return np.sqrt((np.asarray(coords) ** 2).sum(axis=1))
+
+
+def closest(coords, k):
+    """Indices of the k rows closest to the centre (the mean), nearest first.
+
+    This is pClosest from DSC 10, for when only the top k are wanted.
+    """
+    distances = centre_distances(coords)
+    k = min(k, len(distances))
+    nearest = np.argpartition(distances, k - 1)[:k] if k > 0 else np.array([], dtype=int)
+    return nearest[np.argsort(distances[nearest], kind="stable")]
+
+
+def corpus_typicality(corpus_dir, output_dir, corpus_name, top_words=1000, starts_with=1,
+                      n_components=2, scale=False):
+    """Run the corpusTypicality analysis on every .txt file in corpus_dir.
+
+    Writes top_terms_<name>.csv, <name>_pca.csv (with mean and median rows,
+    like the R version) and <name>_typicality.csv. Returns the typicality
+    ranking as a DataFrame.
+    """
+    filenames = sorted(f for f in os.listdir(corpus_dir) if f.endswith(".txt"))
+    texts = []
+    for filename in filenames:
+        with open(os.path.join(corpus_dir, filename), encoding="utf8") as f:
+            texts.append(f.read())
+    mfw, terms = mfw_matrix(texts, top_words, starts_with)
+    coords = pca_coordinates(mfw, n_components, scale)
+
+    with open(os.path.join(output_dir, "top_terms_" + corpus_name + ".csv"), "w", encoding="utf8", newline="") as out:
+        writer = csv.writer(out, quoting=csv.QUOTE_ALL)
+        writer.writerow(["", "x"])
+        for number, term in enumerate(terms, 1):
+            writer.writerow([str(number), term])
+
+    pc_names = ["PC{}".format(i + 1) for i in range(coords.shape[1])]
+    final_table = pd.DataFrame(coords, columns=pc_names)
+    final_table["Filename"] = filenames
+    final_table["Title"] = [f.split(".txt")[0] for f in filenames]
+    final_table["Type"] = "text"
+    summary = pd.DataFrame([coords.mean(axis=0), np.median(coords, axis=0)], columns=pc_names)
+    summary["Type"] = ["mean", "median"]
+    pd.concat([final_table, summary], ignore_index=True).to_csv(
+        os.path.join(output_dir, corpus_name + "_pca.csv"), index=False)
+
+    # Every book is ranked, so this is one full sort rather than a top-k selection
+    distances = centre_distances(coords)
+    order = np.argsort(distances, kind="stable")
+    ranking = pd.DataFrame({
+        "Filename": [filenames[i] for i in order],
+        "Distance": distances[order],
+    })
+    ranking.index = np.arange(1, len(ranking) + 1)
+    ranking.to_csv(os.path.join(output_dir, corpus_name + "_typicality.csv"), index_label="Rank")
+    return ranking
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank texts by how typical they are of the corpus.")
+    parser.add_argument("corpus_dir", help="directory of .txt files")
+    parser.add_argument("output_dir", help="where to write the CSV files")
+    parser.add_argument("corpus_name", help="name used in the output filenames")
+    parser.add_argument("--top-words", type=int, default=1000, help="how many top words to use")
+    parser.add_argument("--starts-with", type=int, default=1,
+                        help="rank of the first word to use; 51 skips the 50 most frequent")
+    parser.add_argument("--components", type=int, default=2, help="number of principal components")
+    parser.add_argument("--scale", action="store_true", help="z-score the words first (prcomp scale=T)")
+    parser.add_argument("-k", type=int, default=21, help="how many of the most typical texts to print")
+    args = parser.parse_args()
+    ranking = corpus_typicality(args.corpus_dir, args.output_dir, args.corpus_name, args.top_words,
+                                args.starts_with, args.components, args.scale)
+    print(ranking.head(args.k))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Book and chapter word counts for DSC 8, from packed corpora.
+
+DSC 8 writes ``bsc_series_wordcount.csv`` and ``bsc_chapter_wordcount.csv``
+by opening every file (and never closing it, which runs out of file
+descriptors on a big chapter set). It works out the series with a
+``startswith`` ladder and the chapter number with fifteen ``endswith``
+checks. Here the series and chapter come from the packed corpus index (see
+dsc.corpus, which parses them from the filename once). The words are counted
+in a process pool over the memory-mapped blob, and both CSVs are written in
+one pass. As in DSC 8, the books (dsc_corpus_clean) go in the series table
+and the chapter files (dsc_chapters/allchapters) in the chapter table, each
+packed separately:
+
+    python -m dsc.wordcounts dsc_corpus_packed dsc_chapters_packed --workers 8
+
+The CSVs have the same header and ``filename, wordcount, series`` rows as
+DSC 8, and words are counted the same way (``len(text.split())``).
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from dsc.corpus import Corpus, read_index
+
+
+SERIES_CSV = "bsc_series_wordcount.csv"
+CHAPTER_CSV = "bsc_chapter_wordcount.csv"
+
+# Each worker opens each packed corpus once
+_corpora = {}
+
+
+def _count_batch(job):
+    pack_dir, filenames = job
+    corpus = _corpora.get(pack_dir)
+    if corpus is None:
+        corpus = _corpora[pack_dir] = Corpus(pack_dir)
+    return [len(corpus.text(filename).split()) for filename in filenames]
+
+
+def _batches(pack_dirs, batch_count):
+    # A few batches per worker, rather than one task per file
+    jobs = []
+    for pack_dir in pack_dirs:
+        filenames = [record.filename for record in read_index(pack_dir)]
+        size = max(1, -(-len(filenames) // batch_count))
+        jobs.extend((pack_dir, filenames[i:i + size]) for i in range(0, len(filenames), size))
+    return jobs
+
+
+def count_words(pack_dirs, workers=1):
+    """Return (pack_dir, record, word count) for every file in the packed corpora, in index order."""
+    jobs = _batches(pack_dirs, workers * 4)
+    if workers == 1:
+        counts = list(map(_count_batch, jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            counts = list(executor.map(_count_batch, jobs))
+    records = {pack_dir: {r.filename: r for r in read_index(pack_dir)} for pack_dir in pack_dirs}
+    results = []
+    for (pack_dir, filenames), batch in zip(jobs, counts):
+        results.extend((pack_dir, records[pack_dir][filename], count) for filename, count in zip(filenames, batch))
+    return results
+
+
+def write_wordcounts(series_dir, chapter_dir=None, series_csv=SERIES_CSV, chapter_csv=CHAPTER_CSV, workers=1):
+    """Write the DSC 8 series and chapter word count CSVs. Returns (books, chapters) written.
+
+    Every file packed in series_dir goes in the series CSV and every file
+    packed in chapter_dir in the chapter CSV. Both are counted in one pool.
+    """
+    pack_dirs = [series_dir] + ([chapter_dir] if chapter_dir is not None else [])
+    books = chapters = 0
+    with open(series_csv, "w", encoding="utf8") as series_out, \
+            open(chapter_csv, "w", encoding="utf8") as chapter_out:
+        series_out.write("filename, wordcount, series\n")
+        chapter_out.write("filename, wordcount, chapter_number\n")
+        for pack_dir, record, count in count_words(pack_dirs, workers):
+            if pack_dir == series_dir:
+                series_out.write("{}, {}, {}\n".format(record.filename, count, record.series))
+                books += 1
+            else:
+                chapter = record.chapter if record.chapter is not None else ""
+                chapter_out.write("{}, {}, {}\n".format(record.filename, count, chapter))
+                chapters += 1
+    return books, chapters
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the DSC 8 book and chapter word count CSVs.")
+    parser.add_argument("series_dir", help="packed corpus of whole books (see dsc.corpus)")
+    parser.add_argument("chapter_dir", nargs="?", help="packed corpus of chapter files")
+    parser.add_argument("--series-csv", default=SERIES_CSV)
+    parser.add_argument("--chapter-csv", default=CHAPTER_CSV)
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    args = parser.parse_args()
+    books, chapters = write_wordcounts(args.series_dir, args.chapter_dir, args.series_csv, args.chapter_csv,
+                                       args.workers)
+    print("Counted {} books and {} chapters".format(books, chapters))
+
+
+if __name__ == "__main__":
+    main()
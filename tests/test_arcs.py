@@ -0,0 +1,33 @@
+import numpy as np
+
+from dsc.arcs import CURLY_QUOTES, sentence_sentiment
+
+
+# A few words, with the values get_sent_values would add up for them
+LEXICON = {"don't": -0.5, "good": 0.75, "bad": -0.75, "wellknown": 0.5, "well": 0.25, "known": 0.1}
+
+
+def test_apostrophes_stay_in_words():
+    # "don't" is one word, not "don" and "t"
+    assert sentence_sentiment(["I don't like it."], LEXICON).tolist() == [-0.5]
+
+
+def test_each_word_counts_once_per_sentence():
+    # sum(data$value) over the lexicon rows whose word is in the sentence
+    scores = sentence_sentiment(["Good, good, GOOD!", "Good and bad.", "Nothing here."], LEXICON)
+    np.testing.assert_allclose(scores, [0.75, 0.0, 0.0])
+
+
+def test_hyphens_dropped_for_syuzhet_only():
+    sentence = ["A well-known good story."]
+    np.testing.assert_allclose(sentence_sentiment(sentence, LEXICON), [1.25])
+    np.testing.assert_allclose(sentence_sentiment(sentence, LEXICON, method="bing"), [1.1])
+
+
+def test_non_ascii_letters_split_words():
+    np.testing.assert_allclose(sentence_sentiment(["café good"], LEXICON), [0.75])
+
+
+def test_curly_quotes_straightened():
+    assert "“Don’t,” she said.".translate(CURLY_QUOTES) == "\"Don't,\" she said."
+    np.testing.assert_allclose(sentence_sentiment(["don’t".translate(CURLY_QUOTES)], LEXICON), [-0.5])
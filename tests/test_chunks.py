@@ -0,0 +1,13 @@
+from dsc.chunks import chunk_rows
+from dsc.normalize import normalize
+
+
+def test_dialogue_removed_line_by_line(tmp_path):
+    text = "“Wait for me\n\nplease,” I said. “Okay.”\n\nShe said “Hi” and left.\n"
+    (tmp_path / "001c_kristys_great_idea_2.txt").write_text(text, encoding="utf8")
+    metadata = ("001c_kristys_great_idea", 2, "Kristy", "001c_kristys_great_idea_2.txt")
+    rows = chunk_rows(str(tmp_path), metadata, remove_dialogue=True, chunk_size=3)
+    per_line = "\n".join(normalize(line, "no-dialogue") for line in text.split("\n"))
+    chunks = [row.split("\t")[2] for row in rows.splitlines()]
+    assert chunks == ['"Wait for me', 'please," I said.', 'She said  and left.']
+    assert " ".join(chunks).split() == per_line.split()
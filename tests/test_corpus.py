@@ -0,0 +1,57 @@
+import pytest
+
+from dsc.corpus import parse_filename
+
+
+# Corpus filenames that appear in the notebooks' outputs
+FILENAMES = """
+001c_kristys_great_idea-s.txt 002c_claudia_and_the_phantom_phone_calls-s.txt
+002c_claudia_and_the_phantom_phone_calls_5.txt 003c_the_truth_about_stacey-s.txt 009c_the_ghost_at_dawns_house_7.txt
+028c_welcome_back_stacey_3.txt 030c_mary_anne_and_the_great_romance_3.txt 032c_kristy_and_the_secret_of_susan_5.txt
+038c_kristys_mystery_admirer_12.txt 038c_kristys_mystery_admirer_3.txt 039c_poor_mallory_10.txt
+042c_jessi_and_the_dance_school_phantom_4.txt 045c_kristy_and_the_baby_parade_1.txt
+045c_kristy_and_the_baby_parade_8.txt 049c_claudia_and_the_genius_of_elm_street_2.txt
+051c_staceys_ex_best_friend_2.txt 052c_mary_anne_plus_too_many_babies_11.txt 058c_staceys_choice_2.txt
+062c_kristy_and_the_worst_kid_ever_3.txt 062c_kristy_and_the_worst_kid_ever_9.txt
+068c_jessi_and_the_bad_babysitter_11.txt 068c_jessi_and_the_bad_babysitter_6.txt 071c_claudia_and_the_perfect_boy_2.txt
+073c_mary_anne_and_miss_priss_9.txt 077c_dwn_and_whitney_friends_forever_2.txt 078c_claudia_and_crazy_peaches.txt
+079c_mary_anne_breaks_the_rules.txt 080c_mallory_pike_no_1_fan_2.txt 085c_claudia_kishi_live_from_wsto_2.txt
+088c_farewell_dawn_2.txt 089c_kristy_and_the_dirty_diapers_2.txt 091c_claudia_and_the_first_thanksgiving_2.txt
+095c_kristy_plus_bart_equals_questionmark_14.txt 096c_abbys_lucky_thirteen_3.txt
+097c_claudia_and_the_worlds_cutest_baby_2.txt 100c_kristys_worst_idea.txt 103c_happy_holidays_jessi.txt
+111c_staceys_secret_friend_8.txt 114c_the_secret_life_of_mary_anne_spier_2.txt 116c_abby_and_the_best_kid_ever.txt
+117c_claudia_and_the_terrible_truth_5.txt 118c_kristy_thomas_dog_trainer_2.txt 119c_staceys_ex_boyfriend_2.txt
+121c_abby_in_wonderland.txt 121c_abby_in_wonderland_2.txt 122c_kristy_in_charge_10.txt 122c_kristy_in_charge_9.txt
+125c_mary_anne_in_the_middle_2.txt 127c_abbys_un_valentine_2.txt 129c_kristy_at_bat_1.txt
+m04_kristy_and_the_missing_child.txt m04c_kristy_and_the_missing_child_1.txt m04c_kristy_and_the_missing_child_2.txt
+m09c_kristy_and_the_haunted_mansion_2.txt m11c_claudia_and_the_mystery_at_the_museum.txt
+m11c_claudia_and_the_mystery_at_the_museum_2.txt m16c_claudia_and_the_clue_in_the_photograph.txt
+m24c_mary_anne_and_the_silent_witness.txt m25c_kristy_and_the_middle_school_vandal_3.txt
+m27c_claudia_and_the_lighthouse_ghost_6.txt m28c_abby_and_the_mystery_baby_3.txt
+m34c_mary_anne_and_the_haunted_bookstore_2.txt m35c_abby_and_the_notorius_neighbor_2.txt
+serr1c_logans_story_10.txt serr2c_logan_bruno_boy_babysitter_2.txt serr3c_shannons_story_2.txt
+ss12_here_come_the_bridesmaids.txt
+""".split()
+
+
+@pytest.mark.parametrize("filename", FILENAMES)
+def test_every_corpus_filename_parses(filename):
+    series, book, chapter = parse_filename(filename)
+    assert book is not None
+    prefix = filename[:len(filename) - len(filename.lstrip("abcdefghijklmnopqrstuvwxyz"))]
+    assert series == (prefix or "main")
+
+
+@pytest.mark.parametrize("filename, expected", [
+    ("001c_kristys_great_idea-s.txt", ("main", 1, None)),
+    ("080c_mallory_pike_no_1_fan_2.txt", ("main", 80, 2)),
+    ("118c_kristy_thomas_dog_trainer_ch2.txt", ("main", 118, None)),
+    ("m04_kristy_and_the_missing_child.txt", ("m", 4, None)),
+    ("serr1c_logans_story_10.txt", ("serr", 1, 10)),
+    ("ss12_here_come_the_bridesmaids.txt", ("ss", 12, None)),
+    ("cd01c_dawn_1.txt", ("cd", 1, 1)),
+    ("/corpus/ff05c_claudia_and_the_friendship_feud_3.txt", ("ff", 5, 3)),
+    ("README.md", ("main", None, None)),
+])
+def test_parse_filename(filename, expected):
+    assert parse_filename(filename) == expected
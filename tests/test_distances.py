@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+from scipy import sparse
+
+from dsc.distances import RunningSums, row_sums
+
+
+@pytest.mark.parametrize("metric", ["cosine", "euclidean"])
+def test_adding_documents_matches_summing_the_stacked_matrix(tmp_path, metric):
+    X = sparse.random(60, 40, density=0.2, random_state=1, format="lil", dtype=np.float32)
+    # An empty document, whose cosine distances are NaN and skipped
+    X[7] = 0
+    X = X.tocsr()
+    keys = ["doc{}".format(i) for i in range(60)]
+    sums = RunningSums.build(X[:25], keys[:25], metric, block_size=8)
+    sums.add(X[25:40], keys[25:40], block_size=4)
+    # A round trip through the state file, as dsc.generations does between runs
+    sums.save(str(tmp_path / "sums.npz"))
+    sums = RunningSums.load(str(tmp_path / "sums.npz"))
+    sums.add(X[40:], keys[40:], block_size=64)
+    assert sums.keys == keys
+    np.testing.assert_allclose(sums.sums, row_sums(X, metric), rtol=1e-5)
+
+
+def test_adding_a_known_key_is_refused():
+    X = sparse.csr_matrix(np.eye(3, dtype=np.float32))
+    sums = RunningSums.build(X, ["a", "b", "c"])
+    with pytest.raises(ValueError, match="Already ranked: b"):
+        sums.add(X[:1], ["b"])
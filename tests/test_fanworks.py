@@ -0,0 +1,66 @@
+from collections import Counter
+
+import numpy as np
+
+from dsc.fanworks import NgramIndex, build_index, ngram_hashes, tokenize
+
+
+FANWORKS = {
+    "a.txt": "Kristy had a great idea. Kristy had a great idea! Then Kristy had a plan.",
+    "b.txt": "Claudia said Kristy had a great idea, and Stacey said Claudia said so.",
+    "c.txt": "Too short.",
+}
+
+
+def naive_ngrams(words, n):
+    return [tuple(w.lower() for w in words[i:i + n]) for i in range(len(words) - n + 1)]
+
+
+def test_index_counts_match_naive_ngram_counts(tmp_path):
+    fanworks = tmp_path / "fanworks"
+    fanworks.mkdir()
+    for name, text in FANWORKS.items():
+        (fanworks / name).write_text(text, encoding="utf8")
+    n = 3
+    total = build_index(str(fanworks), str(tmp_path / "index"), n)
+    index = NgramIndex(str(tmp_path / "index"))
+    words = {name: tokenize(text) for name, text in FANWORKS.items()}
+    naive = Counter(gram for name in sorted(words) for gram in naive_ngrams(words[name], n))
+    assert total == len(index.hashes) == sum(naive.values())
+    assert np.all(np.diff(index.hashes.astype(np.uint64)) >= 0)
+    # One hash per distinct n-gram (no collisions), and each one's rows are its repeats
+    hashes = {gram: int(ngram_hashes(list(gram), n)[0]) for gram in naive}
+    assert len(set(hashes.values())) == len(naive)
+    for gram, count in naive.items():
+        lo = np.searchsorted(index.hashes, np.uint64(hashes[gram]), side="left")
+        hi = np.searchsorted(index.hashes, np.uint64(hashes[gram]), side="right")
+        assert hi - lo == count
+        for row in range(lo, hi):
+            doc, position = index.docs[row], index.positions[row]
+            assert naive_ngrams(words[index.filenames[doc]], n)[position] == gram
+
+
+def test_match_finds_every_word_of_every_shared_ngram(tmp_path):
+    fanworks = tmp_path / "fanworks"
+    fanworks.mkdir()
+    for name, text in FANWORKS.items():
+        (fanworks / name).write_text(text, encoding="utf8")
+    n = 3
+    build_index(str(fanworks), str(tmp_path / "index"), n)
+    index = NgramIndex(str(tmp_path / "index"))
+    query = tokenize("So Kristy had a great idea, said Claudia said Kristy.")
+    expected = set()
+    for doc, name in enumerate(index.filenames):
+        fan_grams = naive_ngrams(tokenize(FANWORKS[name]), n)
+        for i, gram in enumerate(naive_ngrams(query, n)):
+            for j, fan_gram in enumerate(fan_grams):
+                if gram == fan_gram:
+                    expected.update((doc, i + k, j + k) for k in range(n))
+    matches = index.match(query)
+    assert sorted(map(tuple, matches.tolist())) == sorted(expected)
+    assert len(expected) > 0
+
+
+def test_short_texts_have_no_ngrams():
+    assert len(ngram_hashes(["too", "short"], 3)) == 0
+    assert len(ngram_hashes(["just", "three", "words"], 3)) == 1
@@ -0,0 +1,74 @@
+from types import SimpleNamespace
+
+import pytest
+
+from dsc.foodner import read_done, write_food_entities
+
+
+class FakeNLP:
+    """Tags every "cake" as FOOD, and can stop partway like a crashed run."""
+
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+
+    def pipe(self, items, as_tuples, batch_size, n_process):
+        for line, context in items:
+            if context[0] == self.fail_on and context[1] is None:
+                raise KeyboardInterrupt
+            start = line.find("cake")
+            ents = [SimpleNamespace(start_char=start, end_char=start + 4, label_="FOOD")] if start >= 0 else []
+            yield SimpleNamespace(ents=ents), context
+
+
+@pytest.fixture
+def textdir(tmp_path):
+    books = tmp_path / "books"
+    books.mkdir()
+    (books / "001c_a.txt").write_text("cake\n\nno food\n", encoding="utf8")
+    (books / "002c_b.txt").write_text("more cake\n", encoding="utf8")
+    (books / "003c_c.txt").write_text("a cake and cake\n", encoding="utf8")
+    return books
+
+
+def test_resume_after_crash_matches_a_clean_run(tmp_path, textdir):
+    clean = str(tmp_path / "clean.tsv")
+    assert write_food_entities(str(textdir), FakeNLP(), clean) == 3
+    outfile = str(tmp_path / "food.tsv")
+    with pytest.raises(KeyboardInterrupt):
+        write_food_entities(str(textdir), FakeNLP(fail_on="003c_c.txt"), outfile)
+    # Half a row from the book being written, and a torn .done line
+    with open(outfile, "a", encoding="utf8") as f:
+        f.write("003c_c.txt\t0\t2")
+    with open(outfile + ".done", "a", encoding="utf8") as f:
+        f.write("003c_c")
+    assert read_done(outfile + ".done")[0] == {"001c_a.txt", "002c_b.txt"}
+    assert write_food_entities(str(textdir), FakeNLP(), outfile) == 1
+    with open(clean, encoding="utf8") as expected, open(outfile, encoding="utf8") as resumed:
+        assert resumed.read() == expected.read()
+
+
+def test_crash_before_any_book_starts_over(tmp_path, textdir):
+    outfile = str(tmp_path / "food.tsv")
+    with pytest.raises(KeyboardInterrupt):
+        write_food_entities(str(textdir), FakeNLP(fail_on="001c_a.txt"), outfile)
+    assert write_food_entities(str(textdir), FakeNLP(), outfile) == 3
+    with open(outfile, encoding="utf8") as f:
+        assert f.read().splitlines()[:2] == ["book\tline\tstart\tend\tlabel", "001c_a.txt\t0\t0\t4\tFOOD"]
+
+
+def test_food_model_keeps_its_entity_ruler(tmp_path, textdir):
+    spacy = pytest.importorskip("spacy")
+    from dsc.ner import load_ner_model
+
+    model = spacy.blank("en")
+    model.add_pipe("entity_ruler").add_patterns([{"label": "FOOD", "pattern": "cake"}])
+    model.add_pipe("sentencizer")
+    model.to_disk(tmp_path / "food_model")
+    nlp = load_ner_model(str(tmp_path / "food_model"), keep=None)
+    assert nlp.pipe_names == ["entity_ruler", "sentencizer"]
+    outfile = str(tmp_path / "food.tsv")
+    write_food_entities(str(textdir), nlp, outfile)
+    with open(outfile, encoding="utf8") as f:
+        assert "002c_b.txt\t0\t5\t9\tFOOD" in f.read().splitlines()
+    # Keeping only the stock NER components loses the ruler
+    assert load_ner_model(str(tmp_path / "food_model")).pipe_names == []
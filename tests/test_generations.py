@@ -0,0 +1,16 @@
+import numpy as np
+import pytest
+
+from dsc.distances import RunningSums
+from dsc.generations import rank_texts
+
+
+def test_state_without_vocabulary_is_refused(tmp_path):
+    texts = tmp_path / "texts"
+    texts.mkdir()
+    (texts / "a.txt").write_text("kristy claudia", encoding="utf8")
+    state = str(tmp_path / "sums.npz")
+    RunningSums.build(np.array([[0.5, 0.5]]), ["a"]).save(state)
+    (texts / "b.txt").write_text("stacey mary anne", encoding="utf8")
+    with pytest.raises(ValueError, match="no vocabulary"):
+        rank_texts(str(texts), state=state)
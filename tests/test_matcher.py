@@ -0,0 +1,50 @@
+import random
+
+from dsc.matcher import TermMatcher, aligned_matches
+
+
+def naive_matches(terms, text):
+    return sorted(((i, t) for t in set(terms) for i in range(len(text)) if text.startswith(t, i)),
+                  key=lambda match: (match[0], -len(match[1])))
+
+
+def test_overlapping_terms():
+    matcher = TermMatcher(["ice cream", "cream", "cream cheese", "cheese", "eese", "she"])
+    assert list(matcher.finditer("ice cream cheese")) == [
+        (0, "ice cream"), (4, "cream cheese"), (4, "cream"), (10, "cheese"), (12, "eese")]
+
+
+def test_prefix_terms():
+    matcher = TermMatcher(["pie", "pi", "p", "pies"])
+    assert list(matcher.finditer("apple pies")) == [(1, "p"), (2, "p"), (6, "pies"), (6, "pie"), (6, "pi"), (6, "p")]
+
+
+def test_spaces_are_part_of_a_term():
+    matcher = TermMatcher([" pear "])
+    assert not matcher.search("things appear to be fine")
+    assert list(matcher.finditer("a pear, a pear and appears")) == [(9, " pear ")]
+
+
+def test_empty_and_repeated_terms():
+    matcher = TermMatcher(["", "jam", "jam"])
+    assert matcher.terms == ["jam"]
+    assert list(matcher.finditer("jamjam")) == [(0, "jam"), (3, "jam")]
+    assert not TermMatcher([]).search("jam")
+
+
+def test_large_term_list_matches_naive_search():
+    rng = random.Random(16)
+    terms = ["".join(rng.choices("abc d", k=rng.randint(1, 6))) for _ in range(5000)]
+    matcher = TermMatcher(terms)
+    for _ in range(20):
+        text = "".join(rng.choices("abc de", k=200))
+        assert list(matcher.finditer(text)) == naive_matches(terms, text)
+        assert matcher.search(text) == bool(naive_matches(terms, text))
+
+
+def test_repeated_lines_keep_their_own_translation(tmp_path):
+    (tmp_path / "001c_kristys_great_idea-t.txt").write_text("I ate cake.\nHello.\nI ate cake.\n", encoding="utf8")
+    (tmp_path / "001c_kristys_great_idea-s.txt").write_text("J'ai mangé du gâteau.\nBonjour.\nGâteau !\n",
+                                                            encoding="utf8")
+    rows = list(aligned_matches(str(tmp_path), TermMatcher(["cake"])))
+    assert [(row[1], row[5]) for row in rows] == [(0, "J'ai mangé du gâteau."), (2, "Gâteau !")]
@@ -0,0 +1,32 @@
+import numpy as np
+from scipy import stats
+
+from dsc.mdw import fisher_two_sided, stepwise_lda
+
+
+def test_fisher_two_sided_matches_scipy():
+    rng = np.random.default_rng(19)
+    tables = np.concatenate([
+        rng.integers(0, 10, size=(300, 4)),
+        rng.integers(0, 500, size=(200, 4)),
+        # Sparse word counts against big totals, as in the MDW tables
+        np.column_stack([rng.integers(0, 5, 100), rng.integers(1000, 50000, 100),
+                         rng.integers(0, 20, 100), rng.integers(1000, 200000, 100)]),
+        [[0, 0, 0, 0], [0, 5, 0, 7], [3, 0, 0, 4], [10, 10, 10, 10]],
+    ])
+    p = fisher_two_sided(*tables.T)
+    expected = [stats.fisher_exact([[a, b], [c, d]])[1] for a, b, c, d in tables]
+    np.testing.assert_allclose(p, expected, rtol=1e-9, atol=1e-14)
+
+
+def test_stepwise_lda_leaves_out_noise():
+    rng = np.random.default_rng(19)
+    groups = np.repeat(["kristy", "claudia", "stacey"], 40)
+    signal = np.repeat([0.0, 1.0, 2.0], 40) + rng.normal(0, 0.5, 120)
+    X = np.column_stack([rng.normal(size=(120, 6)), signal])
+    names = ["noise{}".format(i) for i in range(6)] + ["signal"]
+    steps = stepwise_lda(X, groups, names)
+    assert steps["feature"].tolist() == ["signal"]
+    assert (steps["p_value"] < 0.05).all()
+    # With no cut-off, noise gets in too
+    assert len(stepwise_lda(X, groups, names, p_enter=1.0)) > 1
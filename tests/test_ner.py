@@ -0,0 +1,29 @@
+import pytest
+
+spacy = pytest.importorskip("spacy")
+
+from dsc.ner import write_ner_files  # noqa: E402
+
+
+@pytest.fixture
+def nlp():
+    model = spacy.blank("fr")
+    model.add_pipe("entity_ruler").add_patterns([{"label": "PER", "pattern": "Kristy"},
+                                                 {"label": "LOC", "pattern": "Stoneybrook"}])
+    return model
+
+
+def test_only_chapters_in_the_model_language_are_tagged(tmp_path, nlp):
+    for name in ["001c_kristys_great_idea_1_fr.txt", "001c_kristys_great_idea_1_en.txt", "notes.txt",
+                 "001c_kristys_great_idea_1_fr_ner_per.txt"]:
+        (tmp_path / name).write_text("Kristy habite à Stoneybrook.", encoding="utf8")
+    assert write_ner_files(str(tmp_path), nlp) == ["001c_kristys_great_idea_1_fr.txt"]
+    with open(tmp_path / "001c_kristys_great_idea_1_fr_ner_loc.txt", encoding="utf8") as f:
+        assert f.read() == "Stoneybrook\n"
+    assert not (tmp_path / "notes_ner_per.txt").exists()
+
+
+def test_ending_can_be_chosen(tmp_path, nlp):
+    (tmp_path / "chapter.txt").write_text("Kristy.", encoding="utf8")
+    (tmp_path / "chapter_fr.txt").write_text("Kristy.", encoding="utf8")
+    assert write_ner_files(str(tmp_path), nlp, ending=".txt") == ["chapter.txt", "chapter_fr.txt"]
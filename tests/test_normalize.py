@@ -0,0 +1,41 @@
+import re
+
+import pytest
+
+from dsc.normalize import PROFILES, Normalizer, normalize
+
+
+def clean_quotes(text_line):
+    # dsc20's clean_quotes, as it's run on each line of a chapter
+    clean_line = re.sub(r"’|‘", "'", text_line)
+    clean_line = re.sub(r'“|”', '"', clean_line)
+    clean_line = re.sub(r'"\w[\w.,\'!?…:\-—\s]*"', '', clean_line)
+    return clean_line
+
+
+TEXT = ('“Wait for me\n\nplease,” I said. “Okay.”\n'
+        'She said, "Hi there, Kristy!" and left.\n'
+        '“Don’t go — yet…” he said.\t“Fine”\n'
+        '"unclosed\n"\n'
+        'No dialogue at all\n')
+
+
+def test_no_dialogue_matches_clean_quotes_per_line():
+    expected = "".join(clean_quotes(line) for line in TEXT.splitlines(keepends=True))
+    assert normalize(TEXT, "no-dialogue") == expected
+    assert "please" in expected
+
+
+@pytest.mark.parametrize("block_size", [1, 2, 7, 64, 1 << 20])
+@pytest.mark.parametrize("profile", ["script", "quotes", "words", "csv", "no-dialogue"])
+def test_stream_does_not_depend_on_block_size(tmp_path, profile, block_size):
+    infile = tmp_path / "in.txt"
+    outfile = tmp_path / "out.txt"
+    infile.write_text(TEXT * 3, encoding="utf8")
+    PROFILES[profile].stream(infile, outfile, block_size)
+    assert outfile.read_text(encoding="utf8") == normalize(TEXT * 3, profile)
+
+
+def test_translate_then_regex():
+    normalizer = Normalizer(delete="x", replace={"a": "b"}, pattern=r"b+", repl="B", lower=True)
+    assert normalizer("AaxA") == "B"
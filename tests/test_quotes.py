@@ -0,0 +1,52 @@
+import re
+
+import numpy as np
+
+from dsc.corpus import pack_corpus
+from dsc.quotes import MEMBERS, QuoteIndex, index_book
+
+
+BOOK = """Chapter 1
+“Hi,” said Dawn. “It’s me — Dawn.” Kristy said nothing.
+“Where’s Mary Anne?” Claudia said. “Gone,” said Mary Anne’s dad.
+No quotes here, said Dawn.
+“Unclosed quote at the end of a line,
+and it doesn’t go on,” said Stacey.
+“Café au lait?” said Mary Anne. “Non,” Dawn said. “Oui!”
+“Nobody said anything.”"""
+
+
+def notebook_quotes(text, member):
+    # DSC 15's Dawn loop: every quote in a line with "said Dawn" or "Dawn said"
+    found = []
+    for number, line in enumerate(text.split("\n")):
+        if "said " + member in line or member + " said" in line:
+            found.extend((number, quote) for quote in re.findall(r"“(.*?)”", line))
+    return found
+
+
+def test_index_book_matches_the_notebook_loops():
+    raw = BOOK.encode("utf8")
+    start, end, paragraph, speakers = index_book(raw)
+    quotes = [raw[s:e].decode("utf8") for s, e in zip(start, end)]
+    assert list(zip(paragraph.tolist(), quotes)) == [
+        (number, quote) for number, line in enumerate(BOOK.split("\n")) for quote in re.findall(r"“(.*?)”", line)]
+    for i, member in enumerate(MEMBERS):
+        rows = np.flatnonzero(speakers & (1 << i))
+        assert [(int(paragraph[row]), quotes[row]) for row in rows] == notebook_quotes(BOOK, member)
+
+
+def test_select_and_text_from_a_packed_corpus(tmp_path):
+    books = tmp_path / "books"
+    books.mkdir()
+    (books / "001c_kristys_great_idea.txt").write_text(BOOK, encoding="utf8")
+    (books / "002c_claudia.txt").write_text("“Yes,” Claudia said.\n“No.”\n", encoding="utf8")
+    pack_corpus(str(books), str(tmp_path / "packed"))
+    index = QuoteIndex.build(str(tmp_path / "packed"))
+    index.save(str(tmp_path / "quotes.npz"))
+    index = QuoteIndex.load(str(tmp_path / "quotes.npz"), str(tmp_path / "packed"))
+    assert [index.text(row) for row in index.select("Claudia")] == ["Where’s Mary Anne?", "Gone,", "Yes,"]
+    assert [index.text(row) for row in index.select("Dawn")] == [
+        "Hi,", "It’s me — Dawn.", "Café au lait?", "Non,", "Oui!"]
+    assert len(index.select()) == len(index) == 10
+    assert sorted(index.sample("Dawn", 5, seed=15)) == sorted(index.text(row) for row in index.select("Dawn"))
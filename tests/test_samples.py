@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from dsc.corpus import parse_filename
+from dsc.samples import _allocate, load_offsets, sample_windows, token_bounds, write_samples
+
+
+CHAPTERS = {
+    "001c_kristys_great_idea_2.txt": 300,
+    "002c_claudia_and_the_phantom_phone_calls_2.txt": 120,
+    "m04c_kristy_and_the_missing_child_2.txt": 200,
+    "serr1c_logans_story_2.txt": 90,
+    "ss12_here_come_the_bridesmaids_2.txt": 20,
+}
+
+
+@pytest.fixture
+def chapters(tmp_path):
+    directory = tmp_path / "ch2"
+    directory.mkdir()
+    rng = np.random.default_rng(21)
+    for name, length in CHAPTERS.items():
+        words = rng.choice(["Kristy", "said", "hi", "don't", "—", "babysitters", "!"], size=length)
+        (directory / name).write_text(" ".join(words) + "\n", encoding="utf8")
+    return directory
+
+
+def test_same_seed_same_samples(chapters):
+    offsets = load_offsets(str(chapters))
+    first = sample_windows(offsets, k=25, window=50, seed=9)
+    assert first == sample_windows(offsets, k=25, window=50, seed=9)
+    assert first != sample_windows(offsets, k=25, window=50, seed=10)
+    assert len(set(first)) == 25
+
+
+@pytest.mark.parametrize("stratify", ["series", "book", None])
+def test_windows_stay_inside_their_chapter(chapters, tmp_path, stratify):
+    offsets = load_offsets(str(chapters), str(tmp_path / "offsets.npz"))
+    windows = sample_windows(offsets, k=40, window=50, seed=1, stratify=stratify)
+    lengths = offsets.lengths()
+    for chapter, start in windows:
+        assert 0 <= start and start + 50 <= lengths[chapter]
+    names = write_samples(str(chapters), offsets, windows, str(tmp_path / "samples"), window=50)
+    for (chapter, start), name in zip(sorted(windows), names):
+        with open(chapters / offsets.filenames[chapter], encoding="utf8") as f:
+            text = f.read()
+        bounds = token_bounds(text)
+        with open(tmp_path / "samples" / name, encoding="utf8") as f:
+            assert f.read() == text[bounds[start, 0]:bounds[start + 49, 1]]
+
+
+def test_strata_get_their_share(chapters):
+    offsets = load_offsets(str(chapters))
+    windows = sample_windows(offsets, k=30, window=50, seed=3, stratify="series")
+    series = [parse_filename(offsets.filenames[chapter])[0] for chapter, _ in windows]
+    # Possible windows per series: main 251 + 71, m 151, serr 41, ss none
+    quotas = dict(zip(["main", "m", "serr", "ss"], _allocate(30, np.array([322, 151, 41, 0]))))
+    assert {name: series.count(name) for name in quotas} == quotas
+
+
+@pytest.mark.parametrize("k, sizes", [
+    (30, [322, 151, 41, 0]),
+    (10, [1, 1, 1, 100]),
+    (7, [3, 3, 3]),
+    (5, [5, 0, 0]),
+    (100, [50, 25, 25]),
+])
+def test_allocate_sums_to_k_within_sizes(k, sizes):
+    sizes = np.array(sizes, dtype=np.int64)
+    counts = _allocate(k, sizes)
+    assert counts.sum() == k
+    assert np.all(counts <= sizes)
+    # Largest remainder: each stratum gets its quota rounded down or up
+    quotas = k * sizes / sizes.sum()
+    assert np.all(counts >= np.minimum(np.floor(quotas), sizes))
+    assert np.all(counts <= np.ceil(quotas))
+
+
+def test_too_many_samples_is_an_error(chapters):
+    offsets = load_offsets(str(chapters))
+    with pytest.raises(ValueError):
+        sample_windows(offsets, k=10, window=1000)
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+from dsc.topics import topic_columns, weighted_means
+
+
+def test_weighted_means_matches_np_average_per_topic():
+    rng = np.random.default_rng(25)
+    ntopics = 5
+    doctopics_df = pd.DataFrame(rng.dirichlet(np.ones(ntopics), size=200), columns=topic_columns(ntopics))
+    doctopics_df["book"] = rng.choice(["001c_kristys_great_idea", "m04c_kristy", "serr1c_logans_story"], 200)
+    doctopics_df["narrator"] = rng.choice(["Kristy", "Claudia", "Logan", "Mary Anne"], 200)
+    doctopics_df["ntokens"] = rng.integers(1, 150, 200)
+    for by in ["book", "narrator", ["book", "narrator"]]:
+        result = weighted_means(doctopics_df, by)
+        # DSC 20's loop: one groupby-apply per topic
+        expected = pd.DataFrame({
+            str(i): doctopics_df.groupby(by).apply(lambda gp: np.average(gp[str(i)], weights=gp["ntokens"]))
+            for i in range(ntopics)})
+        pd.testing.assert_frame_equal(result, expected, check_names=False)
+
+
+def test_groups_without_tokens_are_nan():
+    doctopics_df = pd.DataFrame({"0": [0.2, 0.8], "1": [0.8, 0.2], "book": ["a", "b"], "ntokens": [0, 10]})
+    result = weighted_means(doctopics_df, "book")
+    assert result.loc["a"].isna().all()
+    assert result.loc["b"].tolist() == [0.8, 0.2]
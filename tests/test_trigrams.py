@@ -0,0 +1,35 @@
+from functools import partial
+
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import CountVectorizer
+
+from dsc.trigrams import char_ngrams, hashed_names, ngram_matrix
+
+
+TEXTS = ["Kristy had a great idea", "Claudia's phantom phone calls", "The truth about Stacey",
+         "Mary Anne saves the day", "Dawn and the impossible three", "Kristy's big day", "abc", "",
+         "Good-bye Stacey, good-bye"] * 3
+
+
+@pytest.mark.parametrize("workers, chunk_size", [(1, 4), (1, 1000), (2, 5)])
+@pytest.mark.parametrize("ngram_range", [(3, 3), (2, 4)])
+def test_merged_chunks_match_one_count_vectorizer(workers, chunk_size, ngram_range):
+    counts, vocab = ngram_matrix(TEXTS, ngram_range, workers=workers, chunk_size=chunk_size)
+    vectorizer = CountVectorizer(analyzer=partial(char_ngrams, ngram_range=ngram_range))
+    expected = vectorizer.fit_transform(TEXTS)
+    assert vocab.tolist() == vectorizer.get_feature_names_out().tolist()
+    assert counts.shape == expected.shape
+    assert (counts != expected).nnz == 0
+
+
+def test_hashed_counts_and_names():
+    counts, vocab = ngram_matrix(TEXTS, hashing=True, n_features=2 ** 12, chunk_size=4)
+    exact, exact_vocab = ngram_matrix(TEXTS)
+    assert vocab is None
+    assert counts.sum() == exact.sum()
+    columns = np.flatnonzero(np.asarray(counts.sum(axis=0)).ravel())
+    names = hashed_names(TEXTS, columns, n_features=2 ** 12)
+    # Every n-gram is named in exactly one column
+    named = sorted(gram for name in names for gram in name.split("|"))
+    assert named == sorted(exact_vocab.tolist())
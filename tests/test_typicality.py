@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from dsc.typicality import closest, corpus_typicality
+
+
+def brute_force_ranking(coords):
+    # pClosest: every row's distance from the origin, sorted
+    distances = [np.sqrt(sum(x ** 2 for x in row)) for row in coords]
+    return sorted(range(len(coords)), key=lambda i: distances[i])
+
+
+@pytest.mark.parametrize("k", [0, 1, 5, 21, 50, 80])
+def test_closest_matches_brute_force(k):
+    coords = np.random.default_rng(10).normal(size=(50, 3))
+    assert closest(coords, k).tolist() == brute_force_ranking(coords)[:k]
+
+
+def test_corpus_ranking_matches_brute_force(tmp_path):
+    rng = np.random.default_rng(10)
+    words = ["kristy", "claudia", "stacey", "mary", "anne", "dawn", "mallory", "jessi", "baby", "sitters"]
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    for i in range(30):
+        text = " ".join(rng.choice(words, size=200, p=rng.dirichlet(np.ones(len(words)))))
+        (corpus / "{:03d}c_book.txt".format(i)).write_text(text, encoding="utf8")
+    ranking = corpus_typicality(str(corpus), str(tmp_path), "test")
+    pca = np.loadtxt(tmp_path / "test_pca.csv", delimiter=",", skiprows=1, usecols=(0, 1), max_rows=30)
+    expected = ["{:03d}c_book.txt".format(i) for i in brute_force_ranking(pca)]
+    assert ranking["Filename"].tolist() == expected
+    assert ranking["Distance"].is_monotonic_increasing
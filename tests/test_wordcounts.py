@@ -0,0 +1,31 @@
+from dsc.corpus import pack_corpus
+from dsc.wordcounts import write_wordcounts
+
+
+def test_files_go_to_the_csv_of_their_corpus(tmp_path):
+    books = tmp_path / "books"
+    chapters = tmp_path / "chapters"
+    books.mkdir()
+    chapters.mkdir()
+    # A book whose title ends in a number, and a chapter file with no chapter number
+    (books / "serr1c_logans_story.txt").write_text("one two three", encoding="utf8")
+    (books / "m01c_the_book_of_2.txt").write_text("one two", encoding="utf8")
+    (chapters / "serr1c_logans_story_10.txt").write_text("one", encoding="utf8")
+    (chapters / "118c_kristy_thomas_dog_trainer_ch2.txt").write_text("one two three four", encoding="utf8")
+    pack_corpus(str(books), str(tmp_path / "books_packed"))
+    pack_corpus(str(chapters), str(tmp_path / "chapters_packed"))
+    series_csv = tmp_path / "series.csv"
+    chapter_csv = tmp_path / "chapters.csv"
+    counts = write_wordcounts(str(tmp_path / "books_packed"), str(tmp_path / "chapters_packed"),
+                              str(series_csv), str(chapter_csv))
+    assert counts == (2, 2)
+    assert series_csv.read_text(encoding="utf8").splitlines() == [
+        "filename, wordcount, series",
+        "m01c_the_book_of_2.txt, 2, m",
+        "serr1c_logans_story.txt, 3, serr",
+    ]
+    assert chapter_csv.read_text(encoding="utf8").splitlines() == [
+        "filename, wordcount, chapter_number",
+        "118c_kristy_thomas_dog_trainer_ch2.txt, 4, ",
+        "serr1c_logans_story_10.txt, 1, 10",
+    ]